@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
-from . import auth, places
+from app.config import settings
+
+from . import auth, items, metrics, places, profiler, sync
 
 router = APIRouter()
 
@@ -13,3 +15,25 @@ router.include_router(
     router=places.router,
     prefix="/places",
 )
+
+router.include_router(
+    router=items.router,
+    prefix="/items",
+)
+
+router.include_router(
+    router=sync.router,
+    prefix="/sync",
+)
+
+if settings.METRICS_TOKEN:
+    router.include_router(
+        router=metrics.router,
+        prefix="/metrics",
+    )
+
+if settings.PROFILER_ENABLED:
+    router.include_router(
+        router=profiler.router,
+        prefix="/profiler",
+    )
@@ -0,0 +1,243 @@
+from collections.abc import AsyncGenerator
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+
+from app.config import settings
+from app.database import (
+    DBSessionDep,
+    ReadDBSessionDep,
+    get_read_session,
+    safe_commit,
+)
+from app.dependencies.auth import AuthDep
+from app.dependencies.etag import ConditionalGet
+from app.dependencies.pagination import KeysetPaginationDep
+from app.dependencies.upload import UploadDep
+from app.filters.items import ItemsFilter
+from app.schemas.file import FileRSchema
+from app.schemas.item import ItemRLSchema, ItemsImportSchema
+from app.services.blobs import BlobsService
+from app.services.items import ItemsService
+from app.services.versions import Collection
+from app.utils.image_variants import Variant
+from app.utils.query_stats import lift_query_limits
+from app.utils.records_reader import iter_csv, iter_ndjson
+from app.utils.records_writer import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    negotiate_records_media_type,
+    records_response,
+    rows_json_response,
+)
+
+# Items are filtered by place subtrees, which change with the places.
+items_etag = ConditionalGet(Collection.ITEMS, Collection.PLACES)
+
+router = APIRouter(
+    tags=["items"],
+)
+
+IMPORT_READERS = {
+    "text/csv": iter_csv,
+    "application/x-ndjson": iter_ndjson,
+}
+
+
+@router.get(
+    path="/",
+    dependencies=[Depends(items_etag)],
+    status_code=status.HTTP_200_OK,
+    response_model=list[ItemRLSchema],
+    responses={
+        status.HTTP_200_OK: {
+            "description": (
+                f"One page of at most `limit` items, {settings.PAGE_SIZE_DEFAULT} "
+                "without it, with the URL of the next page in the `Link` "
+                "header. CSV and NDJSON exports are not paginated."
+            ),
+            "content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}},
+        },
+    },
+)
+async def get_items_list(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+    items_filter: Annotated[ItemsFilter, Query(default_factory=ItemsFilter)],
+    pagination: KeysetPaginationDep,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    if media_type := negotiate_records_media_type(accept):
+
+        async def export_items() -> AsyncGenerator[ItemRLSchema]:
+            # The response outlives the request-scoped session, so the cursor
+            # gets a session of its own.
+            async with get_read_session(auth.user_uid) as export_session:
+                service = ItemsService(
+                    db_session=export_session,
+                    user_uid=auth.user_uid,
+                )
+                async for item in await service.get_items_list(items_filter):
+                    yield ItemRLSchema.model_validate(item, from_attributes=True)
+
+        return records_response(
+            media_type=media_type,
+            records=export_items(),
+            model=ItemRLSchema,
+            filename="items",
+        )
+
+    service = ItemsService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    items_result = await service.get_items_list(items_filter, pagination)
+    items = pagination.paginate(
+        await items_result.all(),
+        key=lambda item: (item.uid,),
+        request=request,
+        response=response,
+    )
+
+    return rows_json_response(items, headers=response.headers)
+
+
+@router.get(
+    path="/search/",
+    dependencies=[Depends(items_etag)],
+    status_code=status.HTTP_200_OK,
+    response_model=list[ItemRLSchema],
+)
+async def search_items(  # noqa: PLR0913, PLR0917
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+    q: Annotated[str, Query(min_length=1, max_length=256, title="Search query")],
+    place_uid: Annotated[
+        int | None,
+        Query(title="Place ID, including nested places"),
+    ] = None,
+    category_uid: Annotated[int | None, Query(title="Category ID")] = None,
+    tag_uids: Annotated[
+        list[int] | None,
+        Query(title="Tag IDs, any of which an item must have"),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(ge=1, le=settings.PAGE_SIZE_MAX, title="Max results"),
+    ] = settings.PAGE_SIZE_DEFAULT,
+) -> Response:
+    service = ItemsService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    items = await service.search_items(
+        q,
+        place_uid=place_uid,
+        category_uid=category_uid,
+        tag_uids=tag_uids,
+        limit=limit,
+    )
+    return rows_json_response(items)
+
+
+@router.post(
+    path="/import/",
+    status_code=status.HTTP_200_OK,
+    response_model=ItemsImportSchema,
+)
+async def import_items(
+    request: Request,
+    db_session: DBSessionDep,
+    auth: AuthDep,
+) -> ItemsImportSchema:
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    reader = IMPORT_READERS.get(media_type)
+    if not reader:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Supported content types: {', '.join(IMPORT_READERS)}",
+        )
+    # One lookup per batch: the number of statements grows with the upload.
+    lift_query_limits()
+    service = ItemsService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    async with safe_commit(db_session):
+        return await service.import_items(reader(request.stream()))
+
+
+@router.post(
+    path="/{item_uid}/files/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=FileRSchema,
+)
+async def upload_item_file(
+    item_uid: int,
+    upload: UploadDep,
+    background_tasks: BackgroundTasks,
+    db_session: DBSessionDep,
+    auth: AuthDep,
+) -> FileRSchema:
+    service = ItemsService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    # Checked before the body is read, in a transaction of its own, so that
+    # no connection is held while a large upload is being received.
+    async with safe_commit(db_session):
+        await service.get_item(item_uid)
+    blobs_service = BlobsService(db_session)
+    # The blob is registered in its own transaction: if attaching it fails,
+    # its row is left unreferenced and the garbage collector removes both
+    # the row and the file.
+    async with safe_commit(db_session):
+        blob = await blobs_service.store_blob(upload, settings.FILE_UPLOAD_MAX_SIZE)
+    async with safe_commit(db_session):
+        item = await service.get_item(item_uid)
+        item_file = await service.create_item_file(item, upload.filename, blob)
+    blobs_service.schedule_variants(blob)
+    background_tasks.add_task(blobs_service.precompress, blob)
+    return blobs_service.to_file_r_schema(item_file, blob)
+
+
+@router.get(
+    path="/{item_uid}/files/{file_uid}/",
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+)
+async def download_item_file(  # noqa: PLR0913, PLR0917
+    item_uid: int,
+    file_uid: int,
+    request: Request,
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+    variant: Annotated[
+        Variant | None,
+        Query(title="Thumbnail or preview of an image file"),
+    ] = None,
+) -> Response:
+    service = ItemsService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    item_file, blob = await service.get_item_file(item_uid, file_uid)
+    streamer = await BlobsService(db_session).get_file_streamer(
+        item_file,
+        blob.media_type,
+        variant,
+        request.headers.get("accept-encoding"),
+    )
+    return streamer.get_response(request)
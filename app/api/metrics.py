@@ -0,0 +1,53 @@
+import os
+import secrets
+from typing import Annotated
+
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+
+from app.config import settings
+
+
+async def check_metrics_token(
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None,
+        Depends(HTTPBearer(auto_error=False)),
+    ],
+) -> None:
+    if (
+        credentials is None
+        or not settings.METRICS_TOKEN
+        or not secrets.compare_digest(
+            credentials.credentials.encode(),
+            settings.METRICS_TOKEN.encode(),
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    dependencies=[Depends(check_metrics_token)],
+)
+
+
+@router.get("/", include_in_schema=False)
+async def get_metrics() -> Response:
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several workers: merge the metrics every worker writes to the directory.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    content = await to_thread.run_sync(generate_latest, registry)
+    return Response(content, media_type=CONTENT_TYPE_LATEST)
@@ -1,16 +1,53 @@
+from collections.abc import AsyncGenerator
 from typing import Annotated
 
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
     Query,
+    Request,
+    Response,
     status,
 )
 
-from app.database import DBSessionDep, safe_commit
+from app.config import settings
+from app.database import (
+    DBSessionDep,
+    ReadDBSessionDep,
+    get_read_session,
+    safe_commit,
+)
 from app.dependencies.auth import AuthDep
+from app.dependencies.etag import ConditionalGet
+from app.dependencies.pagination import KeysetPaginationDep
+from app.dependencies.upload import UploadDep
 from app.filters.places import PlacesFilter
-from app.schemas.place import PlaceCSchema, PlaceRLSchema, PlaceRSchema, PlaceUSchema
+from app.schemas.file import FileRSchema
+from app.schemas.place import (
+    PlaceCSchema,
+    PlaceRLSchema,
+    PlaceRSchema,
+    PlaceStatsSchema,
+    PlaceTreeSchema,
+    PlaceUSchema,
+)
+from app.services.blobs import BlobsService
 from app.services.places import PlacesService
+from app.services.versions import Collection
+from app.utils.image_variants import Variant
+from app.utils.records_writer import (
+    CSV_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    negotiate_records_media_type,
+    records_response,
+    rows_json_response,
+)
+
+places_etag = ConditionalGet(Collection.PLACES)
+# Item counts are part of trees and stats.
+places_items_etag = ConditionalGet(Collection.PLACES, Collection.ITEMS)
 
 router = APIRouter(
     tags=["places"],
@@ -19,24 +56,62 @@ router = APIRouter(
 
 @router.get(
     path="/",
+    dependencies=[Depends(places_etag)],
     status_code=status.HTTP_200_OK,
     response_model=list[PlaceRLSchema],
+    responses={
+        status.HTTP_200_OK: {
+            "description": (
+                f"One page of at most `limit` places, {settings.PAGE_SIZE_DEFAULT} "
+                "without it, with the URL of the next page in the `Link` "
+                "header. CSV and NDJSON exports are not paginated."
+            ),
+            "content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}},
+        },
+    },
 )
-async def get_places_list(
-    db_session: DBSessionDep,
+async def get_places_list(  # noqa: PLR0913, PLR0917
+    request: Request,
+    response: Response,
+    db_session: ReadDBSessionDep,
     auth: AuthDep,
     places_filter: Annotated[PlacesFilter, Query(default_factory=PlacesFilter)],
-) -> list[PlaceRLSchema]:
+    pagination: KeysetPaginationDep,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
+    if media_type := negotiate_records_media_type(accept):
+
+        async def export_places() -> AsyncGenerator[PlaceRLSchema]:
+            # The response outlives the request-scoped session, so the cursor
+            # gets a session of its own.
+            async with get_read_session(auth.user_uid) as export_session:
+                service = PlacesService(
+                    db_session=export_session,
+                    user_uid=auth.user_uid,
+                )
+                async for place in await service.get_places_list(places_filter):
+                    yield PlaceRLSchema.model_validate(place, from_attributes=True)
+
+        return records_response(
+            media_type=media_type,
+            records=export_places(),
+            model=PlaceRLSchema,
+            filename="places",
+        )
+
     service = PlacesService(
         db_session=db_session,
         user_uid=auth.user_uid,
     )
-    places_result = await service.get_places_list(places_filter)
+    places_result = await service.get_places_list(places_filter, pagination)
+    places = pagination.paginate(
+        await places_result.all(),
+        key=lambda place: (place.name, place.uid),
+        request=request,
+        response=response,
+    )
 
-    return [
-        PlaceRLSchema.model_validate(place, from_attributes=True)
-        async for place in places_result
-    ]
+    return rows_json_response(places, headers=response.headers)
 
 
 @router.post(
@@ -58,14 +133,79 @@ async def create_place(
     return service.to_place_r_schema(place)
 
 
+@router.get(
+    path="/tree/",
+    dependencies=[Depends(places_items_etag)],
+    status_code=status.HTTP_200_OK,
+    response_model=list[PlaceTreeSchema],
+)
+async def get_places_tree(
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+    max_depth: Annotated[int | None, Query(ge=0, title="Max depth")] = None,
+    with_items_count: Annotated[bool, Query(title="Include items count")] = False,
+) -> list[PlaceTreeSchema]:
+    service = PlacesService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    return await service.get_places_tree(
+        max_depth=max_depth,
+        with_items_count=with_items_count,
+    )
+
+
+@router.get(
+    path="/stats/",
+    dependencies=[Depends(places_items_etag)],
+    status_code=status.HTTP_200_OK,
+    response_model=list[PlaceStatsSchema],
+)
+async def get_places_stats(
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+) -> list[PlaceStatsSchema]:
+    service = PlacesService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    return await service.get_places_stats()
+
+
+@router.get(
+    path="/{place_uid}/tree/",
+    dependencies=[Depends(places_items_etag)],
+    status_code=status.HTTP_200_OK,
+    response_model=PlaceTreeSchema,
+)
+async def get_place_tree(
+    place_uid: int,
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+    max_depth: Annotated[int | None, Query(ge=0, title="Max depth")] = None,
+    with_items_count: Annotated[bool, Query(title="Include items count")] = False,
+) -> PlaceTreeSchema:
+    service = PlacesService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    tree = await service.get_places_tree(
+        place_uid,
+        max_depth=max_depth,
+        with_items_count=with_items_count,
+    )
+    return tree[0]
+
+
 @router.get(
     path="/{place_uid}/",
+    dependencies=[Depends(places_etag)],
     status_code=status.HTTP_200_OK,
     response_model=PlaceRSchema,
 )
 async def get_place(
     place_uid: int,
-    db_session: DBSessionDep,
+    db_session: ReadDBSessionDep,
     auth: AuthDep,
 ) -> PlaceRSchema:
     service = PlacesService(
@@ -94,13 +234,9 @@ async def update_place(
         db_session=db_session,
         user_uid=auth.user_uid,
     )
-    place = await service.get_place(
-        place_uid,
-        join_parent=True,
-    )
     async with safe_commit(db_session):
         place = await service.update_place(
-            place=place,
+            place_uid=place_uid,
             schema=schema,
         )
     return service.to_place_r_schema(place)
@@ -122,3 +258,67 @@ async def delete_place(
     place = await service.get_place(place_uid)
     async with safe_commit(db_session):
         await service.delete_place(place)
+
+
+@router.post(
+    path="/{place_uid}/files/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=FileRSchema,
+)
+async def upload_place_file(
+    place_uid: int,
+    upload: UploadDep,
+    background_tasks: BackgroundTasks,
+    db_session: DBSessionDep,
+    auth: AuthDep,
+) -> FileRSchema:
+    service = PlacesService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    # Checked before the body is read, in a transaction of its own, so that
+    # no connection is held while a large upload is being received.
+    async with safe_commit(db_session):
+        await service.get_place(place_uid)
+    blobs_service = BlobsService(db_session)
+    # The blob is registered in its own transaction: if attaching it fails,
+    # its row is left unreferenced and the garbage collector removes both
+    # the row and the file.
+    async with safe_commit(db_session):
+        blob = await blobs_service.store_blob(upload, settings.FILE_UPLOAD_MAX_SIZE)
+    async with safe_commit(db_session):
+        place = await service.get_place(place_uid)
+        place_file = await service.create_place_file(place, upload.filename, blob)
+    blobs_service.schedule_variants(blob)
+    background_tasks.add_task(blobs_service.precompress, blob)
+    return blobs_service.to_file_r_schema(place_file, blob)
+
+
+@router.get(
+    path="/{place_uid}/files/{file_uid}/",
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+)
+async def download_place_file(  # noqa: PLR0913, PLR0917
+    place_uid: int,
+    file_uid: int,
+    request: Request,
+    db_session: ReadDBSessionDep,
+    auth: AuthDep,
+    variant: Annotated[
+        Variant | None,
+        Query(title="Thumbnail or preview of an image file"),
+    ] = None,
+) -> Response:
+    service = PlacesService(
+        db_session=db_session,
+        user_uid=auth.user_uid,
+    )
+    place_file, blob = await service.get_place_file(place_uid, file_uid)
+    streamer = await BlobsService(db_session).get_file_streamer(
+        place_file,
+        blob.media_type,
+        variant,
+        request.headers.get("accept-encoding"),
+    )
+    return streamer.get_response(request)
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+from typing import Annotated
+
+from anyio import to_thread
+from fastapi import APIRouter, HTTPException, Query, Response, status
+
+from app.config import settings
+from app.dependencies.auth import AdminDep
+from app.utils.stack_sampler import format_collapsed, sample_stacks
+
+router = APIRouter(
+    tags=["profiler"],
+)
+
+# One profile at a time per worker.
+profiling = asyncio.Lock()
+
+
+@router.get(
+    path="/",
+    status_code=status.HTTP_200_OK,
+    response_class=Response,
+    responses={
+        status.HTTP_200_OK: {"content": {"text/plain": {}}},
+    },
+)
+async def get_profile(
+    _auth: AdminDep,
+    seconds: Annotated[
+        float,
+        Query(gt=0, le=settings.PROFILER_MAX_SECONDS, title="Sampling duration"),
+    ] = 10,
+    interval: Annotated[
+        float,
+        Query(ge=0.001, le=1, title="Seconds between samples"),
+    ] = 0.005,
+    all_threads: Annotated[
+        bool,
+        Query(title="Sample worker threads too, not only the event loop"),
+    ] = False,
+    tasks: Annotated[
+        bool,
+        Query(title="Sample the suspended asyncio tasks too"),
+    ] = True,
+) -> Response:
+    """
+    Samples the stacks of the worker that serves the request and returns them
+    in the collapsed format of flamegraph.pl and speedscope. Suspended tasks
+    are sampled under an `asyncio tasks` root, so that waits show up next to
+    the time spent running.
+    """
+
+    if profiling.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already being taken",
+        )
+    async with profiling:
+        # This coroutine runs on the event loop thread.
+        thread_ids = None if all_threads else {threading.get_ident()}
+        samples = await to_thread.run_sync(
+            sample_stacks,
+            seconds,
+            interval,
+            thread_ids,
+            asyncio.get_running_loop() if tasks else None,
+        )
+    return Response(
+        format_collapsed(samples),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="profile-{os.getpid()}.collapsed"'
+            ),
+        },
+    )
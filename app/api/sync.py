@@ -0,0 +1,67 @@
+from collections.abc import AsyncGenerator
+from typing import Annotated
+
+from fastapi import APIRouter, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.database import get_read_session
+from app.dependencies.auth import AuthDep
+from app.schemas.sync import SyncChangeSchema, SyncEndSchema
+from app.services.sync import SyncService
+from app.utils.records_writer import NDJSON_MEDIA_TYPE, iter_ndjson_chunks
+
+router = APIRouter(
+    tags=["sync"],
+)
+
+
+@router.get(
+    path="/",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "description": (
+                "One change of a place or item per line, ending with the "
+                "token of the next sync and the cursor of the next page."
+            ),
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        },
+    },
+)
+async def get_changes(
+    auth: AuthDep,
+    since: Annotated[
+        str | None,
+        Query(title="Token of the last sync, none for a full sync"),
+    ] = None,
+    cursor: Annotated[
+        str | None,
+        Query(title="Cursor of the page to fetch"),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(ge=1, le=settings.SYNC_PAGE_SIZE_MAX, title="Page size"),
+    ] = settings.SYNC_PAGE_SIZE_DEFAULT,
+) -> StreamingResponse:
+    # Rejected before the response starts, the cursor carries the token.
+    position = (
+        SyncService.decode_cursor(cursor) if cursor else SyncService.decode_token(since)
+    )
+
+    async def stream_changes() -> AsyncGenerator[SyncChangeSchema | SyncEndSchema]:
+        # The response outlives the request, so the cursor gets a session of
+        # its own.
+        async with get_read_session(auth.user_uid) as db_session:
+            service = SyncService(
+                db_session=db_session,
+                user_uid=auth.user_uid,
+            )
+            async for change in service.get_changes(position, limit):
+                yield change
+
+    return StreamingResponse(
+        content=iter_ndjson_chunks(stream_changes()),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
@@ -0,0 +1,77 @@
+"""
+Application cache of reference data, per-user place trees and versions, and
+the marks of users who wrote recently (see `app.database.get_read_session`).
+
+Writes through the ORM invalidate the affected keys: a session event records
+the keys of every flushed row in `session.info`, and they are deleted once the
+transaction commits (see `app.database.InvalidatingSession`), so that no
+worker reloads a key from data that is not committed yet.
+
+"""
+
+from collections.abc import Callable
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, UOWTransaction
+
+from app.config import settings
+from app.utils.cache import create_cache
+
+UNITS_KEY = "units"
+CATEGORIES_KEY = "categories"
+PENDING_INVALIDATIONS = "cache_invalidations"
+
+cache = create_cache(
+    settings.CACHE_URL,
+    local_size=settings.CACHE_LOCAL_SIZE,
+    prefix=settings.CACHE_PREFIX,
+    ttl=settings.CACHE_TTL,
+)
+
+
+def places_tree_key(user_uid: int) -> str:
+    return f"places_tree:{user_uid}"
+
+
+def versions_key(user_uid: int) -> str:
+    return f"versions:{user_uid}"
+
+
+def recent_writer_key(user_uid: int) -> str:
+    return f"recent_writer:{user_uid}"
+
+
+# Key to invalidate when a row of the table is inserted, updated or deleted.
+INVALIDATIONS: dict[str, Callable[[Any], str]] = {
+    "units": lambda _unit: UNITS_KEY,
+    "categories": lambda _category: CATEGORIES_KEY,
+    "places": lambda place: places_tree_key(place.owner_uid),
+}
+
+
+def invalidate_on_commit(info: dict[str, Any], *keys: str) -> None:
+    """
+    Deletes the keys once the transaction of the session with this `info`
+    commits, for writes that bypass the ORM.
+    """
+
+    info.setdefault(PENDING_INVALIDATIONS, set()).update(keys)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_invalidations(session: Session, _flush_context: UOWTransaction) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if get_key := INVALIDATIONS.get(getattr(obj, "__tablename__", "")):
+            invalidate_on_commit(session.info, get_key(obj))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_invalidations(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+async def invalidate_committed(info: dict[str, Any]) -> None:
+    if keys := info.pop(PENDING_INVALIDATIONS, None):
+        await cache.delete(keys)
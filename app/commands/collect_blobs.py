@@ -0,0 +1,22 @@
+"""
+Removes file blobs that are no longer referenced by any item or place file.
+
+    Example:
+        python -m app.commands.collect_blobs
+
+"""
+
+import asyncio
+
+from app.database import get_session, safe_commit
+from app.services.blobs import BlobsService
+
+
+async def main() -> None:
+    async with get_session() as db_session, safe_commit(db_session):
+        blob_hashes = await BlobsService(db_session=db_session).collect_garbage()
+    print(f"Removed {len(blob_hashes)} unreferenced blobs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+"""
+Removes the tombstones of deleted places and items that are older than any
+accepted sync token.
+
+    Example:
+        python -m app.commands.prune_tombstones
+
+"""
+
+import asyncio
+
+from app.database import get_session, safe_commit
+from app.services.sync import TombstonesService
+
+
+async def main() -> None:
+    async with get_session() as db_session, safe_commit(db_session):
+        pruned = await TombstonesService(db_session=db_session).prune()
+    print(f"Removed {pruned} tombstones")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+"""
+Recomputes the item stats of all places from their items, repairing any drift
+of the incremental updates.
+
+    Example:
+        python -m app.commands.rebuild_place_stats
+
+"""
+
+import asyncio
+
+from app.database import get_session, safe_commit
+from app.services.place_stats import PlaceStatsService
+
+
+async def main() -> None:
+    async with get_session() as db_session, safe_commit(db_session):
+        await PlaceStatsService(db_session=db_session).rebuild()
+    print("Rebuilt place stats")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,21 +1,106 @@
+import itertools
+import logging
 from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
-from typing import Annotated
+from typing import Annotated, Any
+from uuid import uuid4
 
-from fastapi import Depends
+from fastapi import Depends, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
 
+from app.cache import cache, invalidate_committed, recent_writer_key
 from app.config import settings
+from app.dependencies.auth import AuthDep
+from app.utils.pool_metrics import InstrumentedAsyncQueuePool
+from app.utils.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+def get_connect_args() -> dict[str, Any]:
+    """
+    asyncpg connection arguments.
+
+    PgBouncer in transaction mode hands every transaction to whichever server
+    connection is free, so statements prepared on one connection are missing
+    on the next. With `DB_PGBOUNCER` the prepared statement caches are off and
+    every statement gets a unique name, so that names never collide.
+    """
+
+    connect_args: dict[str, Any] = {
+        "command_timeout": settings.DB_COMMAND_TIMEOUT,
+    }
+    if settings.DB_PGBOUNCER:
+        connect_args |= {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+        if settings.DB_STATEMENT_TIMEOUT:
+            # PgBouncer rejects unknown startup parameters.
+            logger.warning(
+                "DB_STATEMENT_TIMEOUT is ignored with PgBouncer, "
+                "set statement_timeout on the database role instead",
+            )
+    else:
+        connect_args |= {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+        if settings.DB_STATEMENT_TIMEOUT:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT),
+            }
+    return connect_args
+
+
+def create_engine(dsn: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(
+        dsn,
+        echo=False,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_logging_name=name,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=get_connect_args(),
+    )
+    track_queries(engine.sync_engine)
+    return engine
+
+
+engine = create_engine(settings.DATABASE_DSN, "primary")
+replica_engines = [
+    create_engine(dsn, f"replica_{index}")
+    for index, dsn in enumerate(settings.DATABASE_REPLICA_DSNS)
+]
+_replicas = itertools.cycle(replica_engines)
+
+
+class InvalidatingSession(AsyncSession):
+    """
+    Deletes the cache keys of the rows written in the transaction after it
+    commits.
+    """
+
+    async def commit(self) -> None:
+        await super().commit()
+        await invalidate_committed(self.info)
+
 
-engine = create_async_engine(settings.DATABASE_DSN, echo=False)
 get_session = async_sessionmaker(
     engine,
+    class_=InvalidatingSession,
     expire_on_commit=False,
 )
 
@@ -24,12 +109,52 @@ class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 
-async def get_db_session() -> AsyncGenerator[AsyncSession]:
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+# Marks users who wrote recently, whose reads stay on the primary until
+# replicas have caught up. Kept in the cache, so that with a shared cache
+# server the next request of the user sticks whichever worker serves it.
+recent_writer_adapter = TypeAdapter(bool)
+
+
+@asynccontextmanager
+async def get_read_session(user_uid: int) -> AsyncIterator[AsyncSession]:
+    """
+    Session for reads that tolerate replication lag: bound to the next replica
+    in round robin, or to the primary when there are no replicas or the user
+    has written recently.
+    """
+
+    if not replica_engines or await cache.get(
+        recent_writer_key(user_uid),
+        recent_writer_adapter,
+    ):
+        session = get_session()
+    else:
+        session = get_session(bind=next(_replicas))
+    async with session:
+        yield session
+
+
+async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession]:
     async with get_session() as session:
         yield session
+    auth = getattr(request.state, "auth", None)
+    if replica_engines and auth and request.method not in SAFE_METHODS:
+        await cache.set(
+            recent_writer_key(auth.user_uid),
+            recent_writer_adapter,
+            True,
+            ttl=settings.DB_REPLICA_STICKINESS_SECONDS,
+        )
+
+
+async def get_read_db_session(auth: AuthDep) -> AsyncGenerator[AsyncSession]:
+    async with get_read_session(auth.user_uid) as session:
+        yield session
 
 
 DBSessionDep = Annotated[AsyncSession, Depends(get_db_session)]
+ReadDBSessionDep = Annotated[AsyncSession, Depends(get_read_db_session)]
 
 
 @asynccontextmanager
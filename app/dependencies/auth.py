@@ -1,12 +1,15 @@
+import hashlib
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from prometheus_client import Counter
 from pydantic import BaseModel, Field
 from pydantic_core import ValidationError
 
 from app.config import settings
+from app.utils.lru_cache import LRUCache
 
 
 class Auth(BaseModel):
@@ -15,12 +18,30 @@ class Auth(BaseModel):
     )
 
 
+# Verified access tokens, keyed by token digest and kept until their `exp`.
+auth_cache: LRUCache[bytes, Auth] = LRUCache(maxsize=settings.AUTH_CACHE_SIZE)
+
+AUTH_CACHE_LOOKUPS = Counter(
+    "auth_cache_lookups",
+    "Lookups of verified access tokens by result.",
+    ["result"],
+)
+
+
 async def get_auth(
+    request: Request,
     token: Annotated[
         str,
         Depends(OAuth2PasswordBearer(tokenUrl="/api/auth/login/")),
     ],
 ) -> Auth:
+    token_digest = hashlib.sha256(token.encode()).digest()
+    if auth := auth_cache.get(token_digest):
+        AUTH_CACHE_LOOKUPS.labels("hit").inc()
+        # Lets the database session dependencies see who made the request.
+        request.state.auth = auth
+        return auth
+    AUTH_CACHE_LOOKUPS.labels("miss").inc()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         auth = Auth.model_validate(payload)
@@ -30,7 +51,22 @@ async def get_auth(
             detail="Invalid authentication",
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
+    if isinstance(exp := payload.get("exp"), int | float):
+        auth_cache.set(token_digest, auth, expires_at=exp)
+    request.state.auth = auth
     return auth
 
 
 AuthDep = Annotated[Auth, Depends(get_auth)]
+
+
+async def get_admin(auth: AuthDep) -> Auth:
+    if auth.user_uid not in settings.ADMIN_USER_UIDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return auth
+
+
+AdminDep = Annotated[Auth, Depends(get_admin)]
@@ -0,0 +1,87 @@
+from fastapi import HTTPException, Request, Response, status
+
+from app.database import ReadDBSessionDep, engine
+from app.dependencies.auth import AuthDep
+from app.services.versions import Collection, VersionsService
+from app.utils.records_writer import negotiate_records_media_type
+
+# Lets clients store the response, but revalidate it on every use.
+CACHE_CONTROL = "private, no-cache"
+
+
+class ConditionalGet:
+    """
+    Conditional GET for JSON responses built from the user's `collections`.
+
+    The weak ETag is made of the version counters of the collections. A
+    request whose `If-None-Match` still matches them is answered with 304
+    before the endpoint runs, after a lookup of the cached counters only.
+
+    The cached counters are loaded on the primary and may be ahead of a
+    lagging replica, so the ETag of a response read from a replica is read
+    from the replica too, before the data, and is never newer than the data.
+
+        Example:
+            @router.get("/", dependencies=[Depends(ConditionalGet(Collection.PLACES))])
+
+    """
+
+    def __init__(self, *collections: Collection):
+        self.collections = collections
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        db_session: ReadDBSessionDep,
+        auth: AuthDep,
+    ) -> None:
+        if negotiate_records_media_type(request.headers.get("Accept")):
+            # Exports are streamed as they are read, without an ETag.
+            return
+
+        if_none_match = request.headers.get("If-None-Match")
+        versions_service = VersionsService(db_session, auth.user_uid)
+        if db_session.bind is engine or if_none_match:
+            etag = self.make_etag(
+                auth.user_uid,
+                await versions_service.get_versions(),
+            )
+            if if_none_match and self.etag_matches(if_none_match, etag):
+                raise self.not_modified(etag)
+        if db_session.bind is not engine:
+            etag = self.make_etag(
+                auth.user_uid,
+                await versions_service.load_versions(),
+            )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+    def make_etag(self, user_uid: int, versions: dict[str, int]) -> str:
+        # The user is part of the tag, so that a tag kept by a client across a
+        # change of accounts never matches another user's data.
+        tag = ".".join(
+            str(versions.get(collection, 0)) for collection in self.collections
+        )
+        return f'W/"{user_uid}.{tag}"'
+
+    @staticmethod
+    def not_modified(etag: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    @staticmethod
+    def etag_matches(if_none_match: str, etag: str) -> bool:
+        """
+        Weak comparison of `etag` with the tags listed in `If-None-Match`.
+        """
+
+        if if_none_match.strip() == "*":
+            return True
+        opaque_tag = etag.removeprefix("W/")
+        return any(
+            tag.strip().removeprefix("W/") == opaque_tag
+            for tag in if_none_match.split(",")
+        )
@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from typing import Annotated, Any
+
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Integer,
+    Select,
+    SmallInteger,
+    String,
+    tuple_,
+)
+from sqlalchemy.orm import QueryableAttribute
+from sqlalchemy.types import TypeEngine
+
+from app.config import settings
+
+
+class KeysetPagination:
+    """
+    Opaque-cursor keyset pagination.
+
+    The cursor encodes the sort key of the last row of the previous page, so
+    every page is a single index range scan regardless of how deep it is.
+    Without `limit` the page holds `PAGE_SIZE_DEFAULT` rows, so that no list
+    response is unbounded.
+    """
+
+    def __init__(
+        self,
+        limit: Annotated[
+            int | None,
+            Query(
+                ge=1,
+                le=settings.PAGE_SIZE_MAX,
+                title="Page size",
+            ),
+        ] = None,
+        cursor: Annotated[
+            str | None,
+            Query(
+                title="Cursor of the page to fetch",
+            ),
+        ] = None,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    @property
+    def page_size(self) -> int:
+        return self.limit or settings.PAGE_SIZE_DEFAULT
+
+    @staticmethod
+    def encode_cursor(key: Sequence[Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, size: int) -> list[Any]:
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from e
+        if not isinstance(key, list) or len(key) != size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        return key
+
+    @staticmethod
+    def check_key(
+        key: Sequence[Any],
+        key_columns: Sequence[ColumnElement[Any] | QueryableAttribute[Any]],
+    ) -> None:
+        """
+        Rejects a decoded cursor whose values cannot be bound to the key
+        columns, so that a tampered cursor fails with 400 instead of in the
+        database.
+        """
+
+        if not all(
+            is_bindable(value, column.type)
+            for value, column in zip(key, key_columns, strict=True)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    def apply[T: Select[Any]](
+        self,
+        stmt: T,
+        *key_columns: ColumnElement[Any] | QueryableAttribute[Any],
+    ) -> T:
+        """
+        Replaces the ordering of `stmt` with `key_columns` and limits it to one
+        page. One extra row is fetched to tell whether a next page exists.
+        """
+
+        if self.cursor:
+            key = self.decode_cursor(self.cursor, len(key_columns))
+            self.check_key(key, key_columns)
+            stmt = stmt.filter(tuple_(*key_columns) > tuple_(*key))
+        return stmt.order_by(None).order_by(*key_columns).limit(self.page_size + 1)
+
+    def paginate[R](
+        self,
+        rows: Sequence[R],
+        key: Callable[[R], Sequence[Any]],
+        request: Request,
+        response: Response,
+    ) -> Sequence[R]:
+        """
+        Trims the extra row fetched by `apply` and, if there is a next page,
+        advertises its URL in the `Link` header.
+        """
+
+        if len(rows) <= self.page_size:
+            return rows
+        rows = rows[: self.page_size]
+        next_url = request.url.include_query_params(
+            limit=self.page_size,
+            cursor=self.encode_cursor(key(rows[-1])),
+        )
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return rows
+
+
+def is_bindable(value: Any, type_: TypeEngine[Any]) -> bool:
+    if isinstance(type_, Integer):
+        bits = 32
+        if isinstance(type_, BigInteger):
+            bits = 64
+        elif isinstance(type_, SmallInteger):
+            bits = 16
+        # `bool` is an `int` too, but not a valid key.
+        return type(value) is int and -(2 ** (bits - 1)) <= value < 2 ** (bits - 1)
+    if isinstance(type_, String):
+        # Postgres text cannot contain NUL characters.
+        return type(value) is str and "\x00" not in value
+    return isinstance(value, type_.python_type)
+
+
+KeysetPaginationDep = Annotated[KeysetPagination, Depends()]
@@ -0,0 +1,34 @@
+from typing import Annotated
+
+from fastapi import Depends, Header, HTTPException, Request, status
+
+from app.config import settings
+from app.utils.multipart_reader import MultipartReader
+
+
+async def get_upload(
+    request: Request,
+    content_type: Annotated[str, Header()] = "",
+    content_length: Annotated[int | None, Header()] = None,
+) -> MultipartReader:
+    """
+    Streams the file part of a `multipart/form-data` body. Bodies that
+    announce more than `FILE_UPLOAD_MAX_SIZE` bytes are rejected before they
+    are read; chunked bodies are cut off as soon as the limit is crossed.
+    """
+
+    if content_length is not None and content_length > settings.FILE_UPLOAD_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Content exceeds {settings.FILE_UPLOAD_MAX_SIZE} bytes",
+        )
+    try:
+        return MultipartReader(request.stream(), content_type)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e),
+        ) from e
+
+
+UploadDep = Annotated[MultipartReader, Depends(get_upload)]
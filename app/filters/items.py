@@ -0,0 +1,27 @@
+from typing import Annotated
+
+from fa_filter import Filter
+from fastapi import Query
+from pydantic import BeforeValidator
+
+from app.models.item import Item
+
+
+class ItemsFilter(Filter):
+    place_uid__eq: Annotated[
+        int | None,
+        BeforeValidator(lambda v: int(v) if v != "null" else None),
+    ] = Query(
+        default=None,
+        title="Place ID",
+    )
+    category_uid__eq: int | None = Query(
+        default=None,
+        title="Category ID",
+    )
+
+    class Settings(Filter.Settings):
+        model = Item
+        allowed_orders_by = [
+            "name",
+        ]
@@ -3,11 +3,19 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.gzip import GZipMiddleware
 
 from app.api import router
+from app.cache import cache
 from app.config import settings
+from app.middlewares.compression import CompressionMiddleware
 from app.middlewares.process_time import ProcessTimeMiddleware
+from app.services.blobs import image_variants
+from app.utils.loop_monitor import LoopMonitor
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_LAG_THRESHOLD,
+)
 
 
 @asynccontextmanager
@@ -15,7 +23,13 @@ async def lifespan(
     _app: FastAPI,
 ) -> AsyncGenerator[None]:
     await settings.FILES_PATH.mkdir(exist_ok=True, parents=True)
+    image_variants.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
     yield
+    await loop_monitor.stop()
+    await image_variants.stop()
+    await cache.close()
 
 
 app = FastAPI(
@@ -38,11 +52,11 @@ if settings.MODE != "PROD":
     )
 
 app.add_middleware(
-    ProcessTimeMiddleware,
+    CompressionMiddleware,
 )
+# Outermost, so that timings and response sizes include compression.
 app.add_middleware(
-    GZipMiddleware,
-    minimum_size=1000,
+    ProcessTimeMiddleware,
 )
 
 # __________________________ Routers __________________________ #
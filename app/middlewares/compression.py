@@ -0,0 +1,214 @@
+"""
+Middleware to compress responses with the best encoding the client accepts.
+
+zstd, br and gzip are negotiated from `Accept-Encoding` (see
+`app.utils.compression`). Responses are left untouched when they are small,
+already encoded, partial, or of a media type that does not compress, such as
+images or archives; in particular zero-copy file sends of such files keep
+going straight to the socket.
+
+Bodies larger than `COMPRESSION_OFFLOAD_SIZE` are compressed in a worker
+thread so that compressing a large list does not stall the event loop.
+
+    Example:
+        Content-Encoding: zstd
+        Vary: Accept-Encoding
+
+"""
+
+import os
+
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.compression import (
+    Compressor,
+    get_compressor,
+    is_compressible,
+    negotiate_encoding,
+)
+from app.utils.file_streamer import ZEROCOPY_SEND_EXTENSION
+
+UNCOMPRESSED_STATUSES = frozenset((204, 206, 304))
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        offload_size: int = settings.COMPRESSION_OFFLOAD_SIZE,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(
+            send=send,
+            encoding=encoding,
+            minimum_size=self.minimum_size,
+            offload_size=self.offload_size,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        minimum_size: int,
+        offload_size: int,
+    ):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.start_message: Message | None = None
+        self.compressor: Compressor | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body message shows whether the body
+            # is worth compressing.
+            self.start_message = message
+            return
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            await self.start(start_message, message)
+        if self.compressor is None:
+            await self._send(message)
+        elif message["type"] == "http.response.body":
+            await self.send_body(
+                self.compressor,
+                message["body"],
+                message.get("more_body", False),
+            )
+        elif message["type"] == ZEROCOPY_SEND_EXTENSION:
+            await self.send_file(self.compressor, message)
+        else:
+            await self._send(message)
+
+    async def start(self, start_message: Message, message: Message) -> None:
+        headers = MutableHeaders(raw=start_message["headers"])
+        if not self.should_compress(start_message["status"], headers, message):
+            await self._send(start_message)
+            return
+        compressor = get_compressor(self.encoding)
+        headers["Content-Encoding"] = self.encoding
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        if (etag := headers.get("etag")) and not etag.startswith("W/"):
+            # The compressed body is a different representation.
+            headers["ETag"] = f"W/{etag}"
+        if message["type"] == "http.response.body" and not message.get(
+            "more_body",
+            False,
+        ):
+            body = await self.compress(compressor, message["body"], final=True)
+            message["body"] = body
+            headers["Content-Length"] = str(len(body))
+        else:
+            self.compressor = compressor
+            del headers["Content-Length"]
+        await self._send(start_message)
+
+    def should_compress(
+        self,
+        status: int,
+        headers: Headers,
+        message: Message,
+    ) -> bool:
+        if (
+            status in UNCOMPRESSED_STATUSES
+            or "content-encoding" in headers
+            or "content-range" in headers
+            or not is_compressible(headers.get("content-type"))
+        ):
+            return False
+        if (length := headers.get("content-length")) and int(length) < (
+            self.minimum_size
+        ):
+            # A streamed file announces its size up front.
+            return False
+        if message["type"] == ZEROCOPY_SEND_EXTENSION:
+            return message.get("count") is None or message["count"] >= (
+                self.minimum_size
+            )
+        if message["type"] != "http.response.body":
+            return False
+        return message.get("more_body", False) or (
+            len(message.get("body", b"")) >= self.minimum_size
+        )
+
+    async def compress(
+        self,
+        compressor: Compressor,
+        data: bytes,
+        final: bool,
+    ) -> bytes:
+        def run() -> bytes:
+            chunk = compressor.compress(data)
+            return chunk + (compressor.finish() if final else compressor.flush())
+
+        if len(data) >= self.offload_size:
+            return await to_thread.run_sync(run)
+        return run()
+
+    async def send_body(
+        self,
+        compressor: Compressor,
+        body: bytes,
+        more_body: bool,
+    ) -> None:
+        await self._send(
+            {
+                "type": "http.response.body",
+                "body": await self.compress(compressor, body, final=not more_body),
+                "more_body": more_body,
+            }
+        )
+
+    async def send_file(self, compressor: Compressor, message: Message) -> None:
+        """
+        Compresses a zero-copy file send, which cannot go to the socket as is
+        once the body is encoded.
+        """
+
+        fd = message["file"].fileno()
+        offset = message.get("offset") or 0
+        remaining = message.get("count")
+        if remaining is None:
+            remaining = os.fstat(fd).st_size - offset
+        while remaining > 0:
+            chunk = await to_thread.run_sync(
+                os.pread,
+                fd,
+                min(settings.FILE_CHUNK_SIZE, remaining),
+                offset,
+            )
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await self.send_body(compressor, chunk, more_body=True)
+        await self.send_body(
+            compressor,
+            b"",
+            more_body=message.get("more_body", False),
+        )
@@ -1,5 +1,6 @@
 """
-Middleware to track and add process time to the response headers.
+Middleware to track and add process time to the response headers, and to
+record request metrics.
 
 This middleware captures the time when the request is started and when the response is sent.
 The difference of these two times is added to the response headers as 'X-Process-Time'.
@@ -9,13 +10,69 @@ The time is formatted as a float with 4 digits after the decimal point.
     Example:
         X-Process-Time: 0.0123 seconds
 
+The number of SQL statements run until then and the time spent on them are
+sent in 'Server-Timing', next to the total, in milliseconds. Outside PROD a
+request fails once it exceeds `QUERY_COUNT_LIMIT` statements or repeats one
+statement more than `QUERY_REPEAT_LIMIT` times.
+
+    Example:
+        Server-Timing: db;dur=4.1;desc="3 queries", total;dur=12.3
+
+Latency, response size and the number and duration of SQL statements are
+recorded per route template (`/places/{place_uid}/`, not the raw path) and
+exported on `/metrics/`, together with the number of requests in progress.
+
 """
 
+import os
 import time
 
+from prometheus_client import Counter, Gauge, Histogram
 from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.config import settings
+from app.utils.file_streamer import ZEROCOPY_SEND_EXTENSION
+from app.utils.query_stats import QueryStats, query_stats
+
+# Route label of requests that matched no route, so that scans of random paths
+# do not create a series each.
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests by route and status.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being processed.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the last byte of the response is sent.",
+    ["method", "route"],
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the response body as sent.",
+    ["method", "route"],
+    buckets=(100, 1000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements per request.",
+    ["method", "route"],
+)
+
 
 class ProcessTimeMiddleware:
     def __init__(self, app: ASGIApp):
@@ -27,16 +84,68 @@ class ProcessTimeMiddleware:
         receive: Receive,
         send: Send,
     ) -> None:
-        start_time = time.time()
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        end_time: float | None = None
+        status_code = 500
+        response_size = 0
+        stats = QueryStats(
+            limit=settings.QUERY_COUNT_LIMIT,
+            repeat_limit=settings.QUERY_REPEAT_LIMIT,
+            strict=settings.MODE != "PROD",
+        )
+        token = query_stats.set(stats)
 
         async def send_with_process_time(
             message: Message,
         ) -> None:
+            nonlocal end_time, status_code, response_size
             if message["type"] == "http.response.start":
-                process_time = time.time() - start_time
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
                 headers = MutableHeaders(raw=message["headers"])
                 headers["X-Process-Time"] = f"{process_time:.4f} seconds"
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={stats.duration * 1000:.1f};"
+                    f'desc="{stats.count} queries", '
+                    f"total;dur={process_time * 1000:.1f}",
+                )
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            elif message["type"] == ZEROCOPY_SEND_EXTENSION:
+                response_size += get_zerocopy_size(message)
 
             await send(message)
 
-        await self.app(scope, receive, send_with_process_time)
+            if message["type"] != "http.response.start" and not message.get(
+                "more_body",
+                False,
+            ):
+                end_time = time.perf_counter()
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(scope["method"])
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_process_time)
+        finally:
+            in_progress.dec()
+            query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            labels = (scope["method"], route)
+            REQUESTS.labels(*labels, str(status_code)).inc()
+            REQUEST_DURATION.labels(*labels).observe(
+                (end_time or time.perf_counter()) - start_time,
+            )
+            RESPONSE_SIZE.labels(*labels).observe(response_size)
+            REQUEST_DB_QUERIES.labels(*labels).observe(stats.count)
+            REQUEST_DB_DURATION.labels(*labels).observe(stats.duration)
+
+
+def get_zerocopy_size(message: Message) -> int:
+    if (count := message.get("count")) is not None:
+        return int(count)
+    return os.fstat(message["file"].fileno()).st_size - (message.get("offset") or 0)
@@ -1,7 +1,19 @@
 from app.database import Base
 
+from .blob import Blob
+from .category import Category
+from .collection_version import CollectionVersion
+from .item import Item
+from .item_file import ItemFile
+from .m2m import tags_items
 from .place import Place
+from .place_closure import PlaceClosure
+from .place_file import PlaceFile
+from .place_stats import PlaceStats, PlaceValueStats
 from .session import Session
+from .tag import Tag
+from .tombstone import Tombstone
+from .unit import Unit
 from .user import User
 
 __all__ = [
@@ -9,4 +21,17 @@ __all__ = [
     "User",
     "Session",
     "Place",
+    "PlaceClosure",
+    "PlaceFile",
+    "PlaceStats",
+    "PlaceValueStats",
+    "Category",
+    "Unit",
+    "Tag",
+    "Item",
+    "ItemFile",
+    "tags_items",
+    "Blob",
+    "CollectionVersion",
+    "Tombstone",
 ]
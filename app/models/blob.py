@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.typess import utcdatetime
+
+from . import Base
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    hash: Mapped[str] = mapped_column(
+        primary_key=True,
+        comment="SHA-256 of the content",
+    )
+    size: Mapped[int] = mapped_column(
+        BigInteger(),
+        comment="Content size in bytes",
+    )
+    media_type: Mapped[str] = mapped_column(
+        comment="Media type sniffed from the content",
+    )
+    updated_at: Mapped[utcdatetime] = mapped_column(
+        DateTime(timezone=True),
+        default=utcdatetime.now,
+        onupdate=utcdatetime.now,
+        comment="Last time the blob was stored or reused",
+    )
@@ -1,8 +1,13 @@
+from typing import TYPE_CHECKING
+
 from sqlalchemy import ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
 
+if TYPE_CHECKING:
+    from app.models.item import Item
+
 
 class Category(Base):
     __tablename__ = "categories"
@@ -23,3 +28,7 @@ class Category(Base):
         ),
         default=None,
     )
+
+    items: Mapped[list["Item"]] = relationship(
+        back_populates="category",
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "owner_uid",
+            "collection",
+            name="collection_versions_pkey",
+        ),
+    )
+
+    owner_uid: Mapped[int] = mapped_column(
+        ForeignKey(
+            "users.uid",
+            ondelete="CASCADE",
+            name="collection_versions_owner_uid_fkey",
+        ),
+        comment="User ID",
+    )
+    collection: Mapped[str] = mapped_column(
+        comment="Collection name",
+    )
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        comment="Number of transactions that changed the collection",
+    )
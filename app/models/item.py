@@ -1,9 +1,12 @@
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import BigInteger, Computed, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.typess import utcdatetime
+
 from . import Base
 
 if TYPE_CHECKING:
@@ -35,8 +38,41 @@ class CURRENCY_CODE(str, Enum):
     THB = "THB"
 
 
+# Text search configuration of `Item.search_vector`. "simple" does not stem, so
+# names in any language are matched the same way.
+ITEMS_SEARCH_CONFIG = "simple"
+
+
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        Index(
+            "items_place_uid_idx",
+            "place_uid",
+        ),
+        Index(
+            "items_owner_uid_uid_idx",
+            "owner_uid",
+            "uid",
+        ),
+        Index(
+            "items_owner_uid_version_uid_idx",
+            "owner_uid",
+            "version",
+            "uid",
+        ),
+        Index(
+            "items_search_vector_idx",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        Index(
+            "items_name_trgm_idx",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     uid: Mapped[int] = mapped_column(
         primary_key=True,
@@ -65,6 +101,27 @@ class Item(Base):
         default=False,
         comment="Item is public",
     )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{ITEMS_SEARCH_CONFIG}', name), 'A') || "
+            f"setweight(to_tsvector('{ITEMS_SEARCH_CONFIG}', "
+            "coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+        comment="Full-text search document of name and description",
+    )
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        comment="Items collection version of the last change",
+    )
+    updated_at: Mapped[utcdatetime] = mapped_column(
+        DateTime(timezone=True),
+        default=utcdatetime.now,
+        onupdate=utcdatetime.now,
+        comment="Item last changed date",
+    )
 
     category_uid: Mapped[int | None] = mapped_column(
         ForeignKey(
@@ -99,22 +156,22 @@ class Item(Base):
         comment="Place ID",
     )
 
-    category: Mapped[Category | None] = relationship(
+    category: Mapped["Category | None"] = relationship(
         back_populates="items",
     )
-    tags: Mapped[list[Tag]] = relationship(
+    tags: Mapped[list["Tag"]] = relationship(
         secondary="tags_items",
         back_populates="items",
     )
-    unit: Mapped[Unit] = relationship(
+    unit: Mapped["Unit | None"] = relationship(
         back_populates="items",
     )
-    files: Mapped[list[ItemFile]] = relationship(
+    files: Mapped[list["ItemFile"]] = relationship(
         back_populates="item",
     )
-    owner: Mapped[User] = relationship(
+    owner: Mapped["User"] = relationship(
         back_populates="items",
     )
-    place: Mapped[Place | None] = relationship(
+    place: Mapped["Place | None"] = relationship(
         back_populates="items",
     )
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
@@ -11,6 +11,12 @@ if TYPE_CHECKING:
 
 class ItemFile(Base):
     __tablename__ = "item_files"
+    __table_args__ = (
+        Index(
+            "item_files_blob_hash_idx",
+            "blob_hash",
+        ),
+    )
 
     uid: Mapped[int] = mapped_column(
         primary_key=True,
@@ -29,6 +35,14 @@ class ItemFile(Base):
     order: Mapped[int] = mapped_column(
         comment="File order",
     )
+    blob_hash: Mapped[str] = mapped_column(
+        ForeignKey(
+            "blobs.hash",
+            ondelete="RESTRICT",
+            name="item_files_blob_hash_fkey",
+        ),
+        comment="Content blob hash",
+    )
     item_uid: Mapped[int] = mapped_column(
         ForeignKey(
             "items.uid",
@@ -37,6 +51,6 @@ class ItemFile(Base):
         )
     )
 
-    item: Mapped[Item] = relationship(
+    item: Mapped["Item"] = relationship(
         back_populates="files",
     )
@@ -1,12 +1,44 @@
-from sqlalchemy import ForeignKey
+from typing import TYPE_CHECKING
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, Relationship, mapped_column, relationship
 
+from app.core.typess import utcdatetime
+
 from . import Base
 
+if TYPE_CHECKING:
+    from app.models.item import Item
+    from app.models.place_file import PlaceFile
+
 
 class Place(Base):
     __tablename__ = "places"
-    __table_args__ = ()
+    __table_args__ = (
+        Index(
+            "places_parent_uid_idx",
+            "parent_uid",
+        ),
+        Index(
+            "places_owner_uid_name_uid_idx",
+            "owner_uid",
+            "name",
+            "uid",
+        ),
+        Index(
+            "places_owner_uid_parent_uid_name_uid_idx",
+            "owner_uid",
+            "parent_uid",
+            "name",
+            "uid",
+        ),
+        Index(
+            "places_owner_uid_version_uid_idx",
+            "owner_uid",
+            "version",
+            "uid",
+        ),
+    )
 
     uid: Mapped[int] = mapped_column(
         primary_key=True,
@@ -31,6 +63,16 @@ class Place(Base):
             name="places_owner_uid_fkey",
         ),
     )
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        comment="Places collection version of the last change",
+    )
+    updated_at: Mapped[utcdatetime] = mapped_column(
+        DateTime(timezone=True),
+        default=utcdatetime.now,
+        onupdate=utcdatetime.now,
+        comment="Place last changed date",
+    )
 
     parent: Relationship["Place | None"] = relationship(
         back_populates="children",
@@ -39,3 +81,9 @@ class Place(Base):
     children: Relationship[list["Place"]] = relationship(
         back_populates="parent",
     )
+    items: Relationship[list["Item"]] = relationship(
+        back_populates="place",
+    )
+    files: Relationship[list["PlaceFile"]] = relationship(
+        back_populates="place",
+    )
@@ -0,0 +1,40 @@
+from sqlalchemy import ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class PlaceClosure(Base):
+    __tablename__ = "place_closure"
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "ancestor_uid",
+            "descendant_uid",
+            name="place_closure_pkey",
+        ),
+        Index(
+            "place_closure_descendant_uid_depth_idx",
+            "descendant_uid",
+            "depth",
+        ),
+    )
+
+    ancestor_uid: Mapped[int] = mapped_column(
+        ForeignKey(
+            "places.uid",
+            ondelete="CASCADE",
+            name="place_closure_ancestor_uid_fkey",
+        ),
+        comment="Ancestor place ID",
+    )
+    descendant_uid: Mapped[int] = mapped_column(
+        ForeignKey(
+            "places.uid",
+            ondelete="CASCADE",
+            name="place_closure_descendant_uid_fkey",
+        ),
+        comment="Descendant place ID",
+    )
+    depth: Mapped[int] = mapped_column(
+        comment="Distance between ancestor and descendant",
+    )
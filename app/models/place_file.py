@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
@@ -11,6 +11,12 @@ if TYPE_CHECKING:
 
 class PlaceFile(Base):
     __tablename__ = "place_files"
+    __table_args__ = (
+        Index(
+            "place_files_blob_hash_idx",
+            "blob_hash",
+        ),
+    )
 
     uid: Mapped[int] = mapped_column(
         primary_key=True,
@@ -29,6 +35,14 @@ class PlaceFile(Base):
     order: Mapped[int] = mapped_column(
         comment="File order",
     )
+    blob_hash: Mapped[str] = mapped_column(
+        ForeignKey(
+            "blobs.hash",
+            ondelete="RESTRICT",
+            name="place_files_blob_hash_fkey",
+        ),
+        comment="Content blob hash",
+    )
     place_uid: Mapped[int] = mapped_column(
         ForeignKey(
             "places.uid",
@@ -36,6 +50,6 @@ class PlaceFile(Base):
             name="place_files_place_uid_fkey",
         )
     )
-    place: Mapped[Place] = relationship(
+    place: Mapped["Place"] = relationship(
         back_populates="files",
     )
@@ -0,0 +1,60 @@
+from sqlalchemy import ForeignKey, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+from .item import CURRENCY_CODE
+
+
+class PlaceStats(Base):
+    __tablename__ = "place_stats"
+
+    place_uid: Mapped[int] = mapped_column(
+        ForeignKey(
+            "places.uid",
+            ondelete="CASCADE",
+            name="place_stats_place_uid_fkey",
+        ),
+        primary_key=True,
+        comment="Place ID",
+    )
+    items_count: Mapped[int] = mapped_column(
+        comment="Number of items directly in the place",
+    )
+    quantity: Mapped[int] = mapped_column(
+        comment="Total quantity of items directly in the place",
+    )
+    subtree_items_count: Mapped[int] = mapped_column(
+        comment="Number of items in the place and its descendants",
+    )
+    subtree_quantity: Mapped[int] = mapped_column(
+        comment="Total quantity of items in the place and its descendants",
+    )
+
+
+class PlaceValueStats(Base):
+    __tablename__ = "place_value_stats"
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "place_uid",
+            "currency_code",
+            name="place_value_stats_pkey",
+        ),
+    )
+
+    place_uid: Mapped[int] = mapped_column(
+        ForeignKey(
+            "places.uid",
+            ondelete="CASCADE",
+            name="place_value_stats_place_uid_fkey",
+        ),
+        comment="Place ID",
+    )
+    currency_code: Mapped[CURRENCY_CODE] = mapped_column(
+        comment="Currency",
+    )
+    value: Mapped[float] = mapped_column(
+        comment="Total value of items directly in the place",
+    )
+    subtree_value: Mapped[float] = mapped_column(
+        comment="Total value of items in the place and its descendants",
+    )
@@ -1,8 +1,13 @@
+from typing import TYPE_CHECKING
+
 from sqlalchemy import ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
 
+if TYPE_CHECKING:
+    from app.models.item import Item
+
 
 class Tag(Base):
     __tablename__ = "tags"
@@ -22,3 +27,8 @@ class Tag(Base):
             name="tags_owner_uid_fkey",
         )
     )
+
+    items: Mapped[list["Item"]] = relationship(
+        secondary="tags_items",
+        back_populates="tags",
+    )
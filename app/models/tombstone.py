@@ -0,0 +1,52 @@
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.typess import utcdatetime
+
+from . import Base
+
+
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "collection",
+            "uid",
+            name="tombstones_pkey",
+        ),
+        Index(
+            "tombstones_owner_uid_collection_version_uid_idx",
+            "owner_uid",
+            "collection",
+            "version",
+            "uid",
+        ),
+        Index(
+            "tombstones_deleted_at_idx",
+            "deleted_at",
+        ),
+    )
+
+    collection: Mapped[str] = mapped_column(
+        comment="Collection name",
+    )
+    uid: Mapped[int] = mapped_column(
+        comment="ID of the deleted row",
+    )
+    owner_uid: Mapped[int] = mapped_column(
+        ForeignKey(
+            "users.uid",
+            ondelete="CASCADE",
+            name="tombstones_owner_uid_fkey",
+        ),
+        comment="User ID",
+    )
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        comment="Collection version of the deletion",
+    )
+    deleted_at: Mapped[utcdatetime] = mapped_column(
+        DateTime(timezone=True),
+        default=utcdatetime.now,
+        comment="Deletion date",
+    )
@@ -1,7 +1,12 @@
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import TYPE_CHECKING
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
 
+if TYPE_CHECKING:
+    from app.models.item import Item
+
 
 class Unit(Base):
     __tablename__ = "units"
@@ -21,3 +26,7 @@ class Unit(Base):
     short_name: Mapped[str] = mapped_column(
         comment="Item short name",
     )
+
+    items: Mapped[list["Item"]] = relationship(
+        back_populates="unit",
+    )
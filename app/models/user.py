@@ -1,7 +1,12 @@
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import TYPE_CHECKING
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
 
+if TYPE_CHECKING:
+    from app.models.item import Item
+
 
 class User(Base):
     __tablename__ = "users"
@@ -17,3 +22,7 @@ class User(Base):
     password: Mapped[str] = mapped_column(
         comment="User password hash",
     )
+
+    items: Mapped[list["Item"]] = relationship(
+        back_populates="owner",
+    )
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+
+class BlobDTO(BaseModel):
+    hash: str = Field(
+        title="SHA-256 of the content",
+    )
+    size: int = Field(
+        title="Content size in bytes",
+    )
+    media_type: str = Field(
+        title="Media type sniffed from the content",
+    )
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+
+
+class FileRSchema(BaseModel):
+    uid: int = Field(
+        title="File ID",
+    )
+    name: str = Field(
+        title="File name",
+    )
+    extension: str = Field(
+        title="File extension",
+    )
+    order: int = Field(
+        title="File order",
+    )
+    size: int = Field(
+        title="File size in bytes",
+    )
+    media_type: str = Field(
+        title="File media type",
+    )
@@ -96,3 +96,61 @@ class ItemUSchema(BaseModel):
         default=None,
         title="Item category ID",
     )
+
+
+class ItemImportErrorSchema(BaseModel):
+    row: int = Field(
+        title="Row number",
+    )
+    detail: str = Field(
+        title="Error description",
+    )
+
+
+class ItemsImportSchema(BaseModel):
+    imported: int = Field(
+        title="Number of imported items",
+    )
+    errors: list[ItemImportErrorSchema] = Field(
+        default_factory=list,
+        title="Rejected rows",
+    )
+
+
+class ItemRLSchema(BaseModel):
+    uid: int = Field(
+        title="Item ID",
+    )
+    name: str = Field(
+        title="Item name",
+    )
+    description: str | None = Field(
+        default=None,
+        title="Item description",
+    )
+    price: float | None = Field(
+        default=None,
+        title="Item price",
+    )
+    currency_code: CURRENCY_CODE | None = Field(
+        default=None,
+        title="Item currency",
+    )
+    quantity: int = Field(
+        title="Item quantity",
+    )
+    is_public: bool = Field(
+        title="Item is public",
+    )
+    unit_uid: int | None = Field(
+        default=None,
+        title="Item unit ID",
+    )
+    place_uid: int | None = Field(
+        default=None,
+        title="Item place ID",
+    )
+    category_uid: int | None = Field(
+        default=None,
+        title="Item category ID",
+    )
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 
+from app.models.item import CURRENCY_CODE
+
 
 class PlaceCSchema(BaseModel):
     model_config = {
@@ -56,3 +58,62 @@ class PlaceRSchema(BaseModel):
         default=None,
         title="Parent place",
     )
+
+
+class PlaceTreeSchema(BaseModel):
+    uid: int = Field(
+        title="Place ID",
+    )
+    name: str = Field(
+        title="Place name",
+    )
+    parent_uid: int | None = Field(
+        default=None,
+        title="Parent place ID",
+    )
+    items_count: int | None = Field(
+        default=None,
+        title="Number of items directly in the place",
+    )
+    subtree_items_count: int | None = Field(
+        default=None,
+        title="Number of items in the place and its descendants",
+    )
+    children: list["PlaceTreeSchema"] = Field(
+        default_factory=list,
+        title="Child places",
+    )
+
+
+class PlaceValueSchema(BaseModel):
+    currency_code: CURRENCY_CODE = Field(
+        title="Currency",
+    )
+    value: float = Field(
+        title="Total value of items directly in the place",
+    )
+    subtree_value: float = Field(
+        title="Total value of items in the place and its descendants",
+    )
+
+
+class PlaceStatsSchema(BaseModel):
+    place_uid: int = Field(
+        title="Place ID",
+    )
+    items_count: int = Field(
+        title="Number of items directly in the place",
+    )
+    quantity: int = Field(
+        title="Total quantity of items directly in the place",
+    )
+    subtree_items_count: int = Field(
+        title="Number of items in the place and its descendants",
+    )
+    subtree_quantity: int = Field(
+        title="Total quantity of items in the place and its descendants",
+    )
+    values: list[PlaceValueSchema] = Field(
+        default_factory=list,
+        title="Total value of items per currency",
+    )
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.schemas.item import ItemRLSchema
+from app.schemas.place import PlaceRLSchema
+from app.services.versions import Collection
+
+
+class SyncChangeSchema(BaseModel):
+    collection: Collection = Field(
+        title="Collection name",
+    )
+    uid: int = Field(
+        title="Row ID",
+    )
+    version: int = Field(
+        title="Collection version of the change",
+    )
+    updated_at: datetime = Field(
+        title="Change date",
+    )
+    data: PlaceRLSchema | ItemRLSchema | None = Field(
+        default=None,
+        title="Current row, none if it was deleted",
+    )
+
+
+class SyncEndSchema(BaseModel):
+    token: str = Field(
+        title="Token to sync the next changes from, once every page is read",
+    )
+    cursor: str | None = Field(
+        default=None,
+        title="Cursor of the next page",
+    )
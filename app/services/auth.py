@@ -21,8 +21,16 @@ from app.schemas.auth import (
     TokenSchema,
     TokensDTO,
 )
-
-ph = PasswordHasher()
+from app.utils.password_hasher import AsyncPasswordHasher
+
+ph = AsyncPasswordHasher(
+    hasher=PasswordHasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    ),
+    max_workers=settings.PASSWORD_HASHER_WORKERS,
+)
 
 
 JWT_ALGORITHM = "HS256"
@@ -60,7 +68,7 @@ class AuthService:
             )
         user = User(
             email=schema.email,
-            password=ph.hash(schema.password),
+            password=await ph.hash(schema.password),
         )
         self.db_session.add(user)
         await self.db_session.flush()
@@ -75,12 +83,14 @@ class AuthService:
         if not user:
             raise INVALID_CREDENTIALS_HTTP_EXCEPTION
         try:
-            ph.verify(
+            await ph.verify(
                 hash=user.password,
                 password=schema.password,
             )
         except VerifyMismatchError as exc:
             raise INVALID_CREDENTIALS_HTTP_EXCEPTION from exc
+        if ph.check_needs_rehash(user.password):
+            user.password = await ph.hash(schema.password)
         return user.uid
 
     async def refresh_token(
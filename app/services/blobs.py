@@ -0,0 +1,250 @@
+from collections.abc import AsyncIterable
+from datetime import timedelta
+from pathlib import PurePath
+
+from anyio import to_thread
+from fastapi import HTTPException, status
+from sqlalchemy import delete, exists
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.typess import utcdatetime
+from app.models.blob import Blob
+from app.models.item_file import ItemFile
+from app.models.place_file import PlaceFile
+from app.schemas.blob import BlobDTO
+from app.schemas.file import FileRSchema
+from app.utils.blob_store import BlobStore, BlobTooLargeError
+from app.utils.compression import (
+    CODECS,
+    get_precompressed_path,
+    is_compressible,
+    negotiate_encoding,
+    precompress_file,
+)
+from app.utils.file_streamer import FileStreamer
+from app.utils.image_variants import (
+    IMAGE_MEDIA_TYPES,
+    VARIANT_MEDIA_TYPE,
+    ImageVariantsWorker,
+    Variant,
+    VariantSpec,
+)
+
+image_variants = ImageVariantsWorker(
+    specs={
+        "thumbnail": VariantSpec(
+            size=settings.THUMBNAIL_SIZE,
+            crop=True,
+            quality=settings.IMAGE_VARIANT_QUALITY,
+        ),
+        "preview": VariantSpec(
+            size=settings.PREVIEW_SIZE,
+            crop=False,
+            quality=settings.IMAGE_VARIANT_QUALITY,
+        ),
+    },
+    max_workers=settings.IMAGE_VARIANTS_WORKERS,
+    queue_size=settings.IMAGE_VARIANTS_QUEUE_SIZE,
+)
+
+
+class BlobsService:
+    def __init__(
+        self,
+        db_session: AsyncSession,
+    ):
+        self.db_session = db_session
+        self.store = BlobStore(settings.FILES_PATH.joinpath("blobs"))
+
+    async def store_blob(
+        self,
+        chunks: AsyncIterable[bytes],
+        max_size: int | None = None,
+    ) -> BlobDTO:
+        """
+        Stores the content unless an identical blob exists and registers it.
+        Reusing a blob refreshes its `updated_at`, which keeps it out of the
+        garbage collector's reach until the referencing row is committed.
+        """
+
+        try:
+            async with self.store.stage(chunks, max_size) as staged:
+                blob = staged.blob
+                await self.db_session.execute(
+                    insert(Blob)
+                    .values(
+                        hash=blob.hash,
+                        size=blob.size,
+                        media_type=blob.media_type,
+                        updated_at=utcdatetime.now(),
+                    )
+                    .on_conflict_do_update(
+                        index_elements=[Blob.hash],
+                        set_={"updated_at": utcdatetime.now()},
+                    )
+                )
+                # Only once the row is locked: the upsert waits for a garbage
+                # collector that is deleting the blob, which removes the file
+                # before it commits, and the file is then written again.
+                await self.store.place(staged)
+        except BlobTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e),
+            ) from e
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            ) from e
+        return blob
+
+    async def collect_garbage(
+        self,
+        grace_period: timedelta | None = None,
+    ) -> list[str]:
+        """
+        Deletes blobs that neither `item_files` nor `place_files` refer to and
+        that have not been stored or reused within `grace_period`.
+
+        The files are removed before the transaction commits, while the
+        deleted rows are still locked, so that an upload of the same content
+        waits for the commit and writes the file again, see `store_blob`.
+
+        Returns:
+            list[str]: Hashes of the deleted blobs.
+        """
+
+        if grace_period is None:
+            grace_period = timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS)
+        result = await self.db_session.scalars(
+            delete(Blob)
+            .filter(
+                Blob.updated_at < utcdatetime.now() - grace_period,
+                ~exists().where(ItemFile.blob_hash == Blob.hash),
+                ~exists().where(PlaceFile.blob_hash == Blob.hash),
+            )
+            .returning(Blob.hash)
+        )
+        blob_hashes = list(result)
+        for blob_hash in blob_hashes:
+            await self.store.delete(blob_hash)
+        return blob_hashes
+
+    def schedule_variants(self, blob: BlobDTO) -> None:
+        """
+        Queues the rendering of thumbnails and previews for an image blob.
+        """
+
+        if blob.media_type not in IMAGE_MEDIA_TYPES:
+            return
+        image_variants.schedule(
+            self.store.get_path(blob.hash),
+            {
+                variant: self.store.get_variant_path(blob.hash, variant)
+                for variant in image_variants.specs
+            },
+        )
+
+    async def precompress(self, blob: BlobDTO) -> None:
+        """
+        Writes compressed copies of a compressible blob next to it, so that
+        downloads are not compressed again on every request.
+        """
+
+        if (
+            not is_compressible(blob.media_type)
+            or not settings.COMPRESSION_MINIMUM_SIZE
+            <= blob.size
+            <= settings.PRECOMPRESS_MAX_SIZE
+        ):
+            return
+        await to_thread.run_sync(
+            precompress_file,
+            str(self.store.get_path(blob.hash)),
+        )
+
+    async def get_file_streamer(
+        self,
+        file: ItemFile | PlaceFile,
+        media_type: str,
+        variant: Variant | None = None,
+        accept_encoding: str | None = None,
+    ) -> FileStreamer:
+        """
+        Returns:
+            FileStreamer: A streamer of the file itself, or of its precompressed
+            copy in the best encoding the client accepts, or, if `variant` is
+            given, of its WebP rendition, which is rendered if missing.
+        """
+
+        if variant is None:
+            path = self.store.get_path(file.blob_hash)
+            content_encoding = None
+            if accept_encoding and is_compressible(media_type):
+                content_encoding = negotiate_encoding(
+                    accept_encoding,
+                    [
+                        encoding
+                        for encoding in CODECS
+                        if await get_precompressed_path(path, encoding).exists()
+                    ],
+                )
+            return await FileStreamer.create(
+                get_precompressed_path(path, content_encoding)
+                if content_encoding
+                else path,
+                filename=f"{file.name}.{file.extension}"
+                if file.extension
+                else file.name,
+                mime_type=media_type,
+                content_encoding=content_encoding,
+            )
+        path = self.store.get_variant_path(file.blob_hash, variant)
+        if media_type not in IMAGE_MEDIA_TYPES or not await image_variants.get_variant(
+            self.store.get_path(file.blob_hash),
+            path,
+            variant,
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File variant not found",
+            )
+        return await FileStreamer.create(
+            path,
+            filename=f"{file.name}.{variant}.webp",
+            mime_type=VARIANT_MEDIA_TYPE,
+        )
+
+    def get_file_url(self, blob_hash: str) -> str:
+        return str(self.store.get_path(blob_hash).relative_to(settings.FILES_PATH))
+
+    @staticmethod
+    def split_filename(filename: str | None) -> tuple[str, str]:
+        """
+        Returns:
+            tuple[str, str]: The name and the extension of an uploaded file,
+            without any directory the client may have sent.
+        """
+
+        path = PurePath((filename or "").replace("\\", "/")).name or "file"
+        name, dot, extension = path.rpartition(".")
+        if not dot or not name:
+            return path, ""
+        return name, extension.lower()
+
+    @staticmethod
+    def to_file_r_schema(
+        file: ItemFile | PlaceFile,
+        blob: Blob | BlobDTO,
+    ) -> FileRSchema:
+        return FileRSchema(
+            uid=file.uid,
+            name=file.name,
+            extension=file.extension,
+            order=file.order,
+            size=blob.size,
+            media_type=blob.media_type,
+        )
@@ -1,12 +1,62 @@
+from collections.abc import AsyncIterable, Sequence
+from typing import Any
+
 from fastapi import HTTPException, status
-from sqlalchemy import ColumnElement, exists, select
-from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    exists,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
+from app.cache import CATEGORIES_KEY, UNITS_KEY, cache
+from app.config import settings
+from app.core.typess import utcdatetime
+from app.database import get_session
+from app.dependencies.pagination import KeysetPagination
+from app.filters.items import ItemsFilter
+from app.models.blob import Blob
 from app.models.category import Category
-from app.models.item import Item
+from app.models.item import ITEMS_SEARCH_CONFIG, Item
+from app.models.item_file import ItemFile
+from app.models.m2m import tags_items
 from app.models.place import Place
+from app.models.place_closure import PlaceClosure
 from app.models.unit import Unit
-from app.schemas.item import ItemCSchema, ItemUSchema
+from app.schemas.blob import BlobDTO
+from app.schemas.item import (
+    ItemCSchema,
+    ItemImportErrorSchema,
+    ItemRLSchema,
+    ItemsImportSchema,
+    ItemUSchema,
+)
+from app.services.blobs import BlobsService
+from app.services.place_stats import ItemStats, PlaceStatsService
+from app.services.versions import Collection, VersionsService
+from app.utils.records_reader import Record
+
+UIDS_ADAPTER = TypeAdapter(frozenset[int])
+
+ITEMS_COPY_COLUMNS = (
+    "name",
+    "description",
+    "price",
+    "currency_code",
+    "quantity",
+    "is_public",
+    "category_uid",
+    "unit_uid",
+    "owner_uid",
+    "place_uid",
+    "version",
+    "updated_at",
+)
 
 
 class ItemsService:
@@ -21,12 +71,134 @@ class ItemsService:
     def get_items_acl_conditions(self) -> tuple[ColumnElement[bool]]:
         return (Item.owner_uid == self.user_uid,)
 
-    async def get_items_list(self) -> AsyncScalarResult[Item]:
-        return await self.db_session.stream_scalars(
-            select(Item).filter(
+    async def check_references(
+        self,
+        schema: ItemCSchema | ItemUSchema,
+    ) -> None:
+        """
+        Checks that the unit, category and place referenced by the schema exist.
+        Units and categories are looked up in the cache, only the place needs a
+        query.
+        """
+
+        detail = None
+        if schema.unit_uid and schema.unit_uid not in await self.get_unit_uids():
+            detail = "Unit not found"
+        elif (
+            schema.category_uid
+            and schema.category_uid not in await self.get_category_uids()
+        ):
+            detail = "Category not found"
+        elif schema.place_uid and not await self.db_session.scalar(
+            select(
+                exists().where(
+                    Place.uid == schema.place_uid,
+                    Place.owner_uid == self.user_uid,
+                )
+            )
+        ):
+            detail = "Place not found"
+        if detail:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=detail,
+            )
+
+    async def get_unit_uids(self) -> frozenset[int]:
+        return await cache.get_or_load(
+            UNITS_KEY,
+            UIDS_ADAPTER,
+            lambda: self._load_uids(Unit.uid),
+        )
+
+    async def get_category_uids(self) -> frozenset[int]:
+        return await cache.get_or_load(
+            CATEGORIES_KEY,
+            UIDS_ADAPTER,
+            lambda: self._load_uids(Category.uid),
+        )
+
+    @staticmethod
+    async def _load_uids(column: InstrumentedAttribute[int]) -> frozenset[int]:
+        # Cached for every worker, so read on the primary outside of the
+        # request transaction, which may be on a lagging replica.
+        async with get_session() as db_session:
+            return frozenset(await db_session.scalars(select(column)))
+
+    async def get_items_list(
+        self,
+        items_filter: ItemsFilter | None = None,
+        pagination: KeysetPagination | None = None,
+    ) -> AsyncResult[Any]:
+        """
+        Returns:
+            AsyncResult: Rows with the `ItemRLSchema` columns.
+        """
+
+        stmt = select(
+            *(getattr(Item, name) for name in ItemRLSchema.model_fields),
+        ).filter(
+            *self.get_items_acl_conditions(),
+        )
+        if items_filter:
+            stmt = items_filter(stmt)
+        if pagination:
+            stmt = pagination.apply(stmt, Item.uid)
+        return await self.db_session.stream(stmt)
+
+    async def search_items(  # noqa: PLR0913
+        self,
+        query: str,
+        place_uid: int | None = None,
+        category_uid: int | None = None,
+        tag_uids: list[int] | None = None,
+        limit: int = settings.PAGE_SIZE_DEFAULT,
+    ) -> Sequence[Row[Any]]:
+        """
+        Finds items whose name or description match `query` as full text, or
+        whose name contains a word similar to it (pg_trgm), best matches
+        first. `place_uid` includes the items of the whole subtree, `tag_uids`
+        matches items with any of the tags.
+
+        Returns:
+            Sequence[Row]: Rows with the `ItemRLSchema` columns.
+        """
+
+        ts_query = func.websearch_to_tsquery(ITEMS_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(Item.search_vector, ts_query) + func.word_similarity(
+            query,
+            Item.name,
+        )
+        stmt = (
+            select(
+                *(getattr(Item, name) for name in ItemRLSchema.model_fields),
+            )
+            .filter(
                 *self.get_items_acl_conditions(),
+                Item.search_vector.bool_op("@@")(ts_query)
+                | literal(query).bool_op("<%")(Item.name),
             )
+            .order_by(rank.desc(), Item.uid)
+            .limit(limit)
         )
+        if place_uid is not None:
+            stmt = stmt.filter(
+                Item.place_uid.in_(
+                    select(PlaceClosure.descendant_uid).filter(
+                        PlaceClosure.ancestor_uid == place_uid,
+                    )
+                ),
+            )
+        if category_uid is not None:
+            stmt = stmt.filter(Item.category_uid == category_uid)
+        if tag_uids:
+            stmt = stmt.filter(
+                exists().where(
+                    tags_items.c.item_uid == Item.uid,
+                    tags_items.c.tag_uid.in_(tag_uids),
+                ),
+            )
+        return (await self.db_session.execute(stmt)).all()
 
     async def get_item(self, item_uid: int) -> Item:
         item = await self.db_session.scalar(
@@ -43,46 +215,8 @@ class ItemsService:
         return item
 
     async def create_item(self, schema: ItemCSchema) -> Item:
-        if schema.unit_uid:
-            unit_exists = await self.db_session.scalar(
-                select(
-                    exists().where(
-                        Unit.uid == schema.unit_uid,
-                    )
-                )
-            )
-            if not unit_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Unit not found",
-                )
-        if schema.category_uid:
-            category_exists = await self.db_session.scalar(
-                select(
-                    exists().where(
-                        Category.uid == schema.category_uid,
-                    )
-                )
-            )
-            if not category_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Category not found",
-                )
-        if schema.place_uid:
-            place_exists = await self.db_session.scalar(
-                select(
-                    exists().where(
-                        Place.uid == schema.place_uid,
-                        Place.owner_uid == self.user_uid,
-                    )
-                )
-            )
-            if not place_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Place not found",
-                )
+        await self.check_references(schema)
+        version = await self.bump_version()
         item = Item(
             name=schema.name,
             description=schema.description,
@@ -94,11 +228,18 @@ class ItemsService:
             category_uid=schema.category_uid,
             place_uid=schema.place_uid,
             is_public=schema.is_public,
+            version=version,
         )
         self.db_session.add(item)
+        await PlaceStatsService(self.db_session).apply(added=[ItemStats.of(item)])
         return item
 
     async def delete_item(self, item: Item) -> None:
+        await VersionsService(self.db_session, self.user_uid).add_tombstone(
+            Collection.ITEMS,
+            item.uid,
+        )
+        await PlaceStatsService(self.db_session).apply(removed=[ItemStats.of(item)])
         await self.db_session.delete(item)
 
     async def update_item(
@@ -108,48 +249,182 @@ class ItemsService:
     ) -> Item:
         upd = schema.model_dump(exclude_unset=True)
 
-        if schema.unit_uid:
-            unit_exists = await self.db_session.scalar(
-                select(
-                    exists().where(
-                        Unit.uid == schema.unit_uid,
-                    )
-                )
+        await self.check_references(schema)
+
+        item.version = await self.bump_version()
+        old_stats = ItemStats.of(item)
+        for key, value in upd.items():
+            setattr(item, key, value)
+        await PlaceStatsService(self.db_session).apply(
+            added=[ItemStats.of(item)],
+            removed=[old_stats],
+        )
+
+        return item
+
+    async def bump_version(self) -> int:
+        return await VersionsService(self.db_session, self.user_uid).bump(
+            Collection.ITEMS,
+        )
+
+    async def create_item_file(
+        self,
+        item: Item,
+        filename: str | None,
+        blob: BlobDTO,
+    ) -> ItemFile:
+        """
+        Attaches a stored blob to the item as its last file.
+        """
+
+        blobs_service = BlobsService(self.db_session)
+        name, extension = blobs_service.split_filename(filename)
+        order = await self.db_session.scalar(
+            select(func.coalesce(func.max(ItemFile.order), 0) + 1).filter(
+                ItemFile.item_uid == item.uid,
             )
-            if not unit_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Unit not found",
-                )
-        if schema.category_uid:
-            category_exists = await self.db_session.scalar(
-                select(
-                    exists().where(
-                        Category.uid == schema.category_uid,
-                    )
+        )
+        item_file = ItemFile(
+            url=blobs_service.get_file_url(blob.hash),
+            name=name,
+            extension=extension,
+            order=order,
+            blob_hash=blob.hash,
+            item_uid=item.uid,
+        )
+        self.db_session.add(item_file)
+        await self.db_session.flush()
+        return item_file
+
+    async def get_item_file(
+        self,
+        item_uid: int,
+        file_uid: int,
+    ) -> tuple[ItemFile, Blob]:
+        row = (
+            await self.db_session.execute(
+                select(ItemFile, Blob)
+                .join(Item, Item.uid == ItemFile.item_uid)
+                .join(Blob, Blob.hash == ItemFile.blob_hash)
+                .filter(
+                    ItemFile.uid == file_uid,
+                    ItemFile.item_uid == item_uid,
+                    *self.get_items_acl_conditions(),
                 )
             )
-            if not category_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Category not found",
+        ).one_or_none()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found",
+            )
+        return row.tuple()
+
+    async def import_items(
+        self,
+        records: AsyncIterable[Record],
+    ) -> ItemsImportSchema:
+        """
+        Validates records in batches of `settings.ITEMS_IMPORT_BATCH_SIZE` and
+        loads the valid ones with COPY. Rejected rows are reported, the rest
+        are imported.
+        """
+
+        result = ItemsImportSchema(imported=0)
+        batch: list[tuple[int, ItemCSchema]] = []
+        async for row, record in records:
+            if isinstance(record, Exception):
+                result.errors.append(
+                    ItemImportErrorSchema(row=row, detail=str(record)),
                 )
-        if schema.place_uid:
-            place_exists = await self.db_session.scalar(
-                select(
-                    exists().where(
-                        Place.uid == schema.place_uid,
+                continue
+            try:
+                batch.append((row, ItemCSchema.model_validate(record)))
+            except ValidationError as e:
+                result.errors.append(
+                    ItemImportErrorSchema(
+                        row=row,
+                        detail="; ".join(
+                            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                            for error in e.errors()
+                        ),
+                    ),
+                )
+                continue
+            if len(batch) >= settings.ITEMS_IMPORT_BATCH_SIZE:
+                await self._import_batch(batch, result)
+                batch = []
+        if batch:
+            await self._import_batch(batch, result)
+        result.errors.sort(key=lambda error: error.row)
+        return result
+
+    async def _import_batch(
+        self,
+        batch: list[tuple[int, ItemCSchema]],
+        result: ItemsImportSchema,
+    ) -> None:
+        unit_uids = await self.get_unit_uids()
+        category_uids = await self.get_category_uids()
+        place_uids = {schema.place_uid for _, schema in batch if schema.place_uid}
+        found_place_uids: set[int] = set()
+        if place_uids:
+            found_place_uids = set(
+                await self.db_session.scalars(
+                    select(Place.uid).filter(
+                        Place.uid.in_(place_uids),
                         Place.owner_uid == self.user_uid,
                     )
                 )
             )
-            if not place_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Place not found",
-                )
 
-        for key, value in upd.items():
-            setattr(item, key, value)
+        records = []
+        stats = []
+        for row, schema in batch:
+            if schema.unit_uid and schema.unit_uid not in unit_uids:
+                detail = "Unit not found"
+            elif schema.category_uid and schema.category_uid not in category_uids:
+                detail = "Category not found"
+            elif schema.place_uid and schema.place_uid not in found_place_uids:
+                detail = "Place not found"
+            else:
+                records.append(
+                    (
+                        schema.name,
+                        schema.description,
+                        schema.price,
+                        schema.currency_code.name if schema.currency_code else None,
+                        schema.quantity,
+                        schema.is_public,
+                        schema.category_uid,
+                        schema.unit_uid,
+                        self.user_uid,
+                        schema.place_uid,
+                    )
+                )
+                stats.append(
+                    ItemStats(
+                        schema.place_uid,
+                        schema.price,
+                        schema.currency_code,
+                        schema.quantity,
+                    )
+                )
+                continue
+            result.errors.append(ItemImportErrorSchema(row=row, detail=detail))
+        if not records:
+            return
 
-        return item
+        # Bumped once per transaction: all batches get the same version.
+        version = await self.bump_version()
+        updated_at = utcdatetime.now()
+        # COPY runs on the session's own connection, inside its transaction.
+        connection = await self.db_session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+            Item.__tablename__,
+            records=[(*record, version, updated_at) for record in records],
+            columns=ITEMS_COPY_COLUMNS,
+        )
+        await PlaceStatsService(self.db_session).apply(added=stats)
+        result.imported += len(records)
@@ -0,0 +1,283 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from sqlalchemy import (
+    Double,
+    Integer,
+    String,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.item import CURRENCY_CODE, Item
+from app.models.place_closure import PlaceClosure
+from app.models.place_stats import PlaceStats, PlaceValueStats
+
+STATS_COLUMNS = (
+    "place_uid",
+    "items_count",
+    "quantity",
+    "subtree_items_count",
+    "subtree_quantity",
+)
+VALUE_STATS_COLUMNS = ("place_uid", "currency_code", "value", "subtree_value")
+
+
+class ItemStats(NamedTuple):
+    place_uid: int | None
+    price: float | None
+    currency_code: CURRENCY_CODE | None
+    quantity: int
+
+    @classmethod
+    def of(cls, item: Item) -> "ItemStats":
+        return cls(item.place_uid, item.price, item.currency_code, item.quantity)
+
+
+class PlaceStatsService:
+    """
+    Maintains `PlaceStats` and `PlaceValueStats` incrementally: every change
+    of items adds its difference to the place and all of its ancestors, and
+    moving a place moves its subtree totals between the old and the new
+    ancestors. `rebuild` recomputes everything from the items.
+    """
+
+    def __init__(
+        self,
+        db_session: AsyncSession,
+    ):
+        self.db_session = db_session
+
+    async def apply(
+        self,
+        added: Iterable[ItemStats] = (),
+        removed: Iterable[ItemStats] = (),
+    ) -> None:
+        counts: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        values: dict[tuple[int, CURRENCY_CODE], float] = defaultdict(float)
+        for sign, items in ((1, added), (-1, removed)):
+            for item in items:
+                if item.place_uid is None:
+                    continue
+                count = counts[item.place_uid]
+                count[0] += sign
+                count[1] += sign * item.quantity
+                if item.price is not None and item.currency_code is not None:
+                    values[item.place_uid, item.currency_code] += (
+                        sign * item.price * item.quantity
+                    )
+
+        # Updates that do not touch the aggregated fields cancel out.
+        counts = {uid: count for uid, count in counts.items() if any(count)}
+        values = {key: value for key, value in values.items() if value}
+        if counts:
+            await self._apply_counts(counts)
+        if values:
+            await self._apply_values(values)
+
+    async def _apply_counts(self, counts: dict[int, list[int]]) -> None:
+        deltas = (
+            func.unnest(
+                bindparam("place_uids", list(counts), ARRAY(Integer)),
+                bindparam(
+                    "items_counts",
+                    [count[0] for count in counts.values()],
+                    ARRAY(Integer),
+                ),
+                bindparam(
+                    "quantities",
+                    [count[1] for count in counts.values()],
+                    ARRAY(Integer),
+                ),
+            )
+            .table_valued("place_uid", "items_count", "quantity")
+            .render_derived("deltas")
+        )
+        direct = PlaceClosure.depth == 0
+        stmt = insert(PlaceStats).from_select(
+            STATS_COLUMNS,
+            select(
+                PlaceClosure.ancestor_uid,
+                func.sum(case((direct, deltas.c.items_count), else_=0)),
+                func.sum(case((direct, deltas.c.quantity), else_=0)),
+                func.sum(deltas.c.items_count),
+                func.sum(deltas.c.quantity),
+            )
+            .join(deltas, deltas.c.place_uid == PlaceClosure.descendant_uid)
+            .group_by(PlaceClosure.ancestor_uid)
+            # Concurrent transactions lock the rows of shared ancestors in the
+            # same order, so they do not deadlock on them.
+            .order_by(PlaceClosure.ancestor_uid),
+        )
+        await self.db_session.execute(self._increment(stmt))
+
+    async def _apply_values(
+        self,
+        values: dict[tuple[int, CURRENCY_CODE], float],
+    ) -> None:
+        deltas = (
+            func.unnest(
+                bindparam(
+                    "place_uids",
+                    [place_uid for place_uid, _ in values],
+                    ARRAY(Integer),
+                ),
+                bindparam(
+                    "currency_codes",
+                    [currency_code.name for _, currency_code in values],
+                    ARRAY(String),
+                ),
+                bindparam("values", list(values.values()), ARRAY(Double)),
+            )
+            .table_valued("place_uid", "currency_code", "value")
+            .render_derived("deltas")
+        )
+        stmt = insert(PlaceValueStats).from_select(
+            VALUE_STATS_COLUMNS,
+            select(
+                PlaceClosure.ancestor_uid,
+                cast(deltas.c.currency_code, PlaceValueStats.currency_code.type),
+                func.sum(case((PlaceClosure.depth == 0, deltas.c.value), else_=0)),
+                func.sum(deltas.c.value),
+            )
+            .join(deltas, deltas.c.place_uid == PlaceClosure.descendant_uid)
+            .group_by(PlaceClosure.ancestor_uid, deltas.c.currency_code)
+            .order_by(PlaceClosure.ancestor_uid, deltas.c.currency_code),
+        )
+        await self.db_session.execute(self._increment(stmt))
+
+    async def attach_subtree(self, place_uid: int) -> None:
+        """
+        Adds the subtree totals of the place to its ancestors, after
+        `PlacesService.attach_subtree`.
+        """
+
+        await self._shift_subtree(place_uid, 1)
+
+    async def detach_subtree(self, place_uid: int) -> None:
+        """
+        Subtracts the subtree totals of the place from its ancestors, before
+        `PlacesService.detach_subtree`.
+        """
+
+        await self._shift_subtree(place_uid, -1)
+
+    async def _shift_subtree(self, place_uid: int, sign: int) -> None:
+        await self.db_session.execute(
+            self._increment(
+                insert(PlaceStats).from_select(
+                    STATS_COLUMNS,
+                    select(
+                        PlaceClosure.ancestor_uid,
+                        literal(0),
+                        literal(0),
+                        sign * PlaceStats.subtree_items_count,
+                        sign * PlaceStats.subtree_quantity,
+                    )
+                    .join(PlaceStats, PlaceStats.place_uid == place_uid)
+                    .filter(
+                        PlaceClosure.descendant_uid == place_uid,
+                        PlaceClosure.depth > 0,
+                    )
+                    .order_by(PlaceClosure.ancestor_uid),
+                )
+            )
+        )
+        await self.db_session.execute(
+            self._increment(
+                insert(PlaceValueStats).from_select(
+                    VALUE_STATS_COLUMNS,
+                    select(
+                        PlaceClosure.ancestor_uid,
+                        PlaceValueStats.currency_code,
+                        literal(0.0),
+                        sign * PlaceValueStats.subtree_value,
+                    )
+                    .join(PlaceValueStats, PlaceValueStats.place_uid == place_uid)
+                    .filter(
+                        PlaceClosure.descendant_uid == place_uid,
+                        PlaceClosure.depth > 0,
+                    )
+                    .order_by(
+                        PlaceClosure.ancestor_uid,
+                        PlaceValueStats.currency_code,
+                    ),
+                )
+            )
+        )
+
+    @staticmethod
+    def _increment(stmt: Insert) -> Insert:
+        """
+        Adds the inserted values to the existing row on conflict.
+        """
+
+        table = stmt.table
+        return stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key),
+            set_={
+                column.name: column + stmt.excluded[column.name]
+                for column in table.columns
+                if not column.primary_key
+            },
+        )
+
+    async def rebuild(self) -> None:
+        """
+        Recomputes the stats of all places from their items, repairing any
+        drift of the incremental updates.
+        """
+
+        # Writers wait for the rebuild to commit, so that their increments
+        # apply on top of the recomputed totals instead of being lost.
+        await self.db_session.execute(
+            text(
+                f"LOCK TABLE {PlaceStats.__tablename__}, "
+                f"{PlaceValueStats.__tablename__} IN EXCLUSIVE MODE"
+            )
+        )
+        await self.db_session.execute(delete(PlaceStats))
+        await self.db_session.execute(delete(PlaceValueStats))
+
+        direct = PlaceClosure.depth == 0
+        value = Item.price * Item.quantity
+        await self.db_session.execute(
+            insert(PlaceStats).from_select(
+                STATS_COLUMNS,
+                select(
+                    PlaceClosure.ancestor_uid,
+                    func.count().filter(direct),
+                    func.coalesce(func.sum(Item.quantity).filter(direct), 0),
+                    func.count(),
+                    func.sum(Item.quantity),
+                )
+                .join(Item, Item.place_uid == PlaceClosure.descendant_uid)
+                .group_by(PlaceClosure.ancestor_uid),
+            )
+        )
+        await self.db_session.execute(
+            insert(PlaceValueStats).from_select(
+                VALUE_STATS_COLUMNS,
+                select(
+                    PlaceClosure.ancestor_uid,
+                    Item.currency_code,
+                    func.coalesce(func.sum(value).filter(direct), 0),
+                    func.sum(value),
+                )
+                .join(Item, Item.place_uid == PlaceClosure.descendant_uid)
+                .filter(
+                    Item.price.is_not(None),
+                    Item.currency_code.is_not(None),
+                )
+                .group_by(PlaceClosure.ancestor_uid, Item.currency_code),
+            )
+        )
@@ -1,11 +1,45 @@
+from typing import Any
+
 from fastapi import HTTPException, status
-from sqlalchemy import ColumnElement, select, text
-from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
-from sqlalchemy.orm import joinedload
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    ColumnElement,
+    delete,
+    exists,
+    func,
+    insert,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy.orm import aliased, joinedload
 
+from app.cache import cache, places_tree_key
+from app.database import get_session
+from app.dependencies.pagination import KeysetPagination
 from app.filters.places import PlacesFilter
+from app.models.blob import Blob
+from app.models.item import Item
 from app.models.place import Place
-from app.schemas.place import PlaceCSchema, PlaceRLSchema, PlaceRSchema, PlaceUSchema
+from app.models.place_closure import PlaceClosure
+from app.models.place_file import PlaceFile
+from app.models.place_stats import PlaceStats, PlaceValueStats
+from app.schemas.blob import BlobDTO
+from app.schemas.place import (
+    PlaceCSchema,
+    PlaceRLSchema,
+    PlaceRSchema,
+    PlaceStatsSchema,
+    PlaceTreeSchema,
+    PlaceUSchema,
+    PlaceValueSchema,
+)
+from app.services.blobs import BlobsService
+from app.services.place_stats import PlaceStatsService
+from app.services.versions import Collection, VersionsService
+
+PLACES_TREE_ADAPTER = TypeAdapter(list[PlaceTreeSchema])
 
 
 class PlacesService:
@@ -34,20 +68,191 @@ class PlacesService:
             parent_uid=schema.parent_uid,
             owner_uid=self.user_uid,
             parent=parent,
+            version=await self.bump_version(),
         )
         self.db_session.add(place)
+        await self.db_session.flush()
+        await self.db_session.execute(
+            insert(PlaceClosure).values(
+                ancestor_uid=place.uid,
+                descendant_uid=place.uid,
+                depth=0,
+            )
+        )
+        await self.attach_subtree(place.uid, place.parent_uid)
         return place
 
     async def get_places_list(
         self,
         places_filter: PlacesFilter | None = None,
-    ) -> AsyncScalarResult[Place]:
-        stmt = select(Place).filter(
+        pagination: KeysetPagination | None = None,
+    ) -> AsyncResult[Any]:
+        """
+        Returns:
+            AsyncResult: Rows with the `PlaceRLSchema` columns. Plain columns
+            skip ORM instance hydration, which dominates the cost of long lists.
+        """
+
+        stmt = select(
+            *(getattr(Place, name) for name in PlaceRLSchema.model_fields),
+        ).filter(
             *self.get_places_acl_conditions(),
         )
         if places_filter:
             stmt = places_filter(stmt)
-        return await self.db_session.stream_scalars(stmt)
+        if pagination:
+            stmt = pagination.apply(stmt, Place.name, Place.uid)
+        return await self.db_session.stream(stmt)
+
+    async def get_places_tree(
+        self,
+        place_uid: int | None = None,
+        *,
+        max_depth: int | None = None,
+        with_items_count: bool = False,
+    ) -> list[PlaceTreeSchema]:
+        """
+        Loads the subtree rooted at `place_uid` (or every root place of the
+        user) in a single query and assembles it into nested nodes. The whole
+        tree without counts is cached per user.
+        """
+
+        if place_uid is None and max_depth is None and not with_items_count:
+            return await cache.get_or_load(
+                places_tree_key(self.user_uid),
+                PLACES_TREE_ADAPTER,
+                self._load_cached_places_tree,
+            )
+        return await self._load_places_tree(
+            place_uid,
+            max_depth=max_depth,
+            with_items_count=with_items_count,
+        )
+
+    async def _load_cached_places_tree(self) -> list[PlaceTreeSchema]:
+        # Cached for every worker, so read on the primary outside of the
+        # request transaction, which may be on a lagging replica or hold
+        # writes that are rolled back later.
+        async with get_session() as db_session:
+            return await PlacesService(
+                db_session,
+                self.user_uid,
+            )._load_places_tree()
+
+    async def _load_places_tree(
+        self,
+        place_uid: int | None = None,
+        *,
+        max_depth: int | None = None,
+        with_items_count: bool = False,
+    ) -> list[PlaceTreeSchema]:
+        root = aliased(Place)
+        stmt = (
+            select(
+                Place.uid,
+                Place.name,
+                Place.parent_uid,
+            )
+            .join(PlaceClosure, PlaceClosure.descendant_uid == Place.uid)
+            .join(root, root.uid == PlaceClosure.ancestor_uid)
+            .filter(
+                *self.get_places_acl_conditions(),
+            )
+            .order_by(
+                PlaceClosure.depth,
+                Place.name,
+            )
+        )
+        if place_uid is None:
+            stmt = stmt.filter(root.parent_uid.is_(None))
+        else:
+            stmt = stmt.filter(root.uid == place_uid)
+        if max_depth is not None:
+            stmt = stmt.filter(PlaceClosure.depth <= max_depth)
+        if with_items_count:
+            stmt = stmt.add_columns(
+                func.coalesce(PlaceStats.items_count, 0).label("items_count"),
+                func.coalesce(PlaceStats.subtree_items_count, 0).label(
+                    "subtree_items_count",
+                ),
+            ).outerjoin(PlaceStats, PlaceStats.place_uid == Place.uid)
+
+        nodes: dict[int, PlaceTreeSchema] = {}
+        roots: list[PlaceTreeSchema] = []
+        # Rows come ordered by depth, so a parent is always seen before its
+        # children.
+        for row in await self.db_session.execute(stmt):
+            node = PlaceTreeSchema(
+                uid=row.uid,
+                name=row.name,
+                parent_uid=row.parent_uid,
+                items_count=row._mapping.get("items_count"),
+                subtree_items_count=row._mapping.get("subtree_items_count"),
+            )
+            nodes[node.uid] = node
+            parent = nodes.get(node.parent_uid) if node.parent_uid else None
+            if parent:
+                parent.children.append(node)
+            else:
+                roots.append(node)
+        if place_uid is not None and not roots:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Place not found",
+            )
+        return roots
+
+    async def get_places_stats(self) -> list[PlaceStatsSchema]:
+        """
+        Returns the item aggregates of every place of the user, read from the
+        maintained `PlaceStats` rather than computed from the items.
+        """
+
+        stats = {
+            row.place_uid: PlaceStatsSchema(
+                place_uid=row.place_uid,
+                items_count=row.items_count,
+                quantity=row.quantity,
+                subtree_items_count=row.subtree_items_count,
+                subtree_quantity=row.subtree_quantity,
+            )
+            for row in await self.db_session.execute(
+                select(
+                    Place.uid.label("place_uid"),
+                    func.coalesce(PlaceStats.items_count, 0).label("items_count"),
+                    func.coalesce(PlaceStats.quantity, 0).label("quantity"),
+                    func.coalesce(PlaceStats.subtree_items_count, 0).label(
+                        "subtree_items_count",
+                    ),
+                    func.coalesce(PlaceStats.subtree_quantity, 0).label(
+                        "subtree_quantity",
+                    ),
+                )
+                .outerjoin(PlaceStats, PlaceStats.place_uid == Place.uid)
+                .filter(*self.get_places_acl_conditions())
+                .order_by(Place.uid)
+            )
+        }
+        values = await self.db_session.execute(
+            select(
+                PlaceValueStats.place_uid,
+                PlaceValueStats.currency_code,
+                PlaceValueStats.value,
+                PlaceValueStats.subtree_value,
+            )
+            .join(Place, Place.uid == PlaceValueStats.place_uid)
+            .filter(*self.get_places_acl_conditions())
+            .order_by(PlaceValueStats.place_uid, PlaceValueStats.currency_code)
+        )
+        for row in values:
+            stats[row.place_uid].values.append(
+                PlaceValueSchema(
+                    currency_code=row.currency_code,
+                    value=row.value,
+                    subtree_value=row.subtree_value,
+                )
+            )
+        return list(stats.values())
 
     def get_places_acl_conditions(
         self,
@@ -76,17 +281,99 @@ class PlacesService:
             )
         return place
 
+    async def create_place_file(
+        self,
+        place: Place,
+        filename: str | None,
+        blob: BlobDTO,
+    ) -> PlaceFile:
+        """
+        Attaches a stored blob to the place as its last file.
+        """
+
+        blobs_service = BlobsService(self.db_session)
+        name, extension = blobs_service.split_filename(filename)
+        order = await self.db_session.scalar(
+            select(func.coalesce(func.max(PlaceFile.order), 0) + 1).filter(
+                PlaceFile.place_uid == place.uid,
+            )
+        )
+        place_file = PlaceFile(
+            url=blobs_service.get_file_url(blob.hash),
+            name=name,
+            extension=extension,
+            order=order,
+            blob_hash=blob.hash,
+            place_uid=place.uid,
+        )
+        self.db_session.add(place_file)
+        await self.db_session.flush()
+        return place_file
+
+    async def get_place_file(
+        self,
+        place_uid: int,
+        file_uid: int,
+    ) -> tuple[PlaceFile, Blob]:
+        row = (
+            await self.db_session.execute(
+                select(PlaceFile, Blob)
+                .join(Place, Place.uid == PlaceFile.place_uid)
+                .join(Blob, Blob.hash == PlaceFile.blob_hash)
+                .filter(
+                    PlaceFile.uid == file_uid,
+                    PlaceFile.place_uid == place_uid,
+                    *self.get_places_acl_conditions(),
+                )
+            )
+        ).one_or_none()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found",
+            )
+        return row.tuple()
+
     async def delete_place(
         self,
         place: Place,
     ) -> None:
+        # Lock order of every place write: the places counter, the items
+        # counter if items change, and only then place stats or the closure.
+        # Item writes also take the items counter before the stats, so that
+        # concurrent writes of a user do not deadlock.
+        versions_service = VersionsService(self.db_session, self.user_uid)
+        places_version = await self.bump_version()
+        items_version = await versions_service.bump(Collection.ITEMS)
+        await versions_service.add_tombstone(Collection.PLACES, place.uid)
+        # Children are re-rooted, so their subtrees lose every ancestor above
+        # them as well.
+        await PlaceStatsService(self.db_session).detach_subtree(place.uid)
+        await self.detach_subtree(place.uid)
+        # The FKs would set these to NULL too, but without stamping the rows,
+        # so that syncing clients would not see the change.
+        await self.db_session.execute(
+            update(Place)
+            .filter(Place.parent_uid == place.uid)
+            .values(parent_uid=None, version=places_version),
+        )
+        await self.db_session.execute(
+            update(Item)
+            .filter(Item.place_uid == place.uid)
+            .values(place_uid=None, version=items_version),
+        )
         await self.db_session.delete(place)
 
     async def update_place(
         self,
-        place: Place,
+        place_uid: int,
         schema: PlaceUSchema,
     ) -> Place:
+        # Taken first, see `delete_place`. It also serializes the moves of a
+        # user, so that two moves cannot both pass the cycle check, and the
+        # place is read after any move that committed meanwhile.
+        version = await self.bump_version()
+        place = await self.get_place(place_uid, join_parent=True)
         parent = place.parent
         if place.parent_uid != schema.parent_uid:
             if schema.parent_uid:
@@ -96,21 +383,31 @@ class PlacesService:
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="Parent place not found",
                     )
-                parent_uids = await self.get_parent_uids(schema.parent_uid)
-                if place.uid in parent_uids:
+                if await self.is_ancestor(place.uid, schema.parent_uid):
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="Cycle detected",
                     )
             else:
                 parent = None
+            stats_service = PlaceStatsService(self.db_session)
+            await stats_service.detach_subtree(place.uid)
+            await self.detach_subtree(place.uid, keep_root=True)
+            await self.attach_subtree(place.uid, schema.parent_uid)
+            await stats_service.attach_subtree(place.uid)
         place.parent = parent
 
         for attr, value in schema.model_dump(exclude_unset=True).items():
             setattr(place, attr, value)
+        place.version = version
 
         return place
 
+    async def bump_version(self) -> int:
+        return await VersionsService(self.db_session, self.user_uid).bump(
+            Collection.PLACES,
+        )
+
     @staticmethod
     def to_place_r_schema(place: Place) -> PlaceRSchema:
         return PlaceRSchema(
@@ -129,23 +426,109 @@ class PlacesService:
         self,
         place_uid: int | None,
     ) -> set[int]:
+        """
+        Returns the place itself and all of its ancestors.
+        """
+
         if place_uid is None:
             return set()
-        cte = text(
-            """
-        WITH RECURSIVE lineplaces AS (
-            SELECT uid, parent_uid
-            FROM places
-            WHERE uid = :place_uid
-
-            UNION ALL
-
-            SELECT f.uid, f.parent_uid
-            FROM places f
-            INNER JOIN lineplaces l ON l.parent_uid = f.uid
-        )
-        SELECT uid FROM lineplaces;
-        """,
-        ).bindparams(place_uid=place_uid)
-        result = await self.db_session.execute(cte)
-        return {row[0] for row in result}
+        result = await self.db_session.scalars(
+            select(PlaceClosure.ancestor_uid).filter(
+                PlaceClosure.descendant_uid == place_uid,
+            )
+        )
+        return set(result)
+
+    async def get_descendant_uids(
+        self,
+        place_uid: int,
+        max_depth: int | None = None,
+    ) -> set[int]:
+        """
+        Returns the place itself and all of its descendants.
+        """
+
+        stmt = select(PlaceClosure.descendant_uid).filter(
+            PlaceClosure.ancestor_uid == place_uid,
+        )
+        if max_depth is not None:
+            stmt = stmt.filter(PlaceClosure.depth <= max_depth)
+        result = await self.db_session.scalars(stmt)
+        return set(result)
+
+    async def is_ancestor(
+        self,
+        ancestor_uid: int,
+        descendant_uid: int,
+    ) -> bool:
+        return bool(
+            await self.db_session.scalar(
+                select(
+                    exists().where(
+                        PlaceClosure.ancestor_uid == ancestor_uid,
+                        PlaceClosure.descendant_uid == descendant_uid,
+                    )
+                )
+            )
+        )
+
+    async def attach_subtree(
+        self,
+        place_uid: int,
+        parent_uid: int | None,
+    ) -> None:
+        """
+        Links the subtree rooted at `place_uid` to `parent_uid` and all of its
+        ancestors.
+        """
+
+        if parent_uid is None:
+            return
+        supertree = aliased(PlaceClosure)
+        subtree = aliased(PlaceClosure)
+        await self.db_session.execute(
+            insert(PlaceClosure).from_select(
+                ["ancestor_uid", "descendant_uid", "depth"],
+                select(
+                    supertree.ancestor_uid,
+                    subtree.descendant_uid,
+                    supertree.depth + subtree.depth + 1,
+                )
+                .join(subtree, true())
+                .filter(
+                    supertree.descendant_uid == parent_uid,
+                    subtree.ancestor_uid == place_uid,
+                ),
+            )
+        )
+
+    async def detach_subtree(
+        self,
+        place_uid: int,
+        *,
+        keep_root: bool = False,
+    ) -> None:
+        """
+        Removes links between the subtree rooted at `place_uid` and the
+        ancestors of the place. With `keep_root` the links inside the subtree,
+        including the place's own self-reference, stay intact.
+        """
+
+        subtree = aliased(PlaceClosure)
+        supertree = aliased(PlaceClosure)
+        subtree_uids = select(subtree.descendant_uid).filter(
+            subtree.ancestor_uid == place_uid,
+        )
+        ancestor_uids = select(supertree.ancestor_uid).filter(
+            supertree.descendant_uid == place_uid,
+        )
+        if keep_root:
+            ancestor_uids = ancestor_uids.filter(
+                supertree.ancestor_uid != place_uid,
+            )
+        await self.db_session.execute(
+            delete(PlaceClosure).filter(
+                PlaceClosure.descendant_uid.in_(subtree_uids),
+                PlaceClosure.ancestor_uid.in_(ancestor_uids),
+            )
+        )
@@ -0,0 +1,230 @@
+import time
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+from typing import Any, NamedTuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.typess import utcdatetime
+from app.dependencies.pagination import KeysetPagination
+from app.models.item import Item
+from app.models.place import Place
+from app.models.tombstone import Tombstone
+from app.schemas.item import ItemRLSchema
+from app.schemas.place import PlaceRLSchema
+from app.schemas.sync import SyncChangeSchema, SyncEndSchema
+from app.services.versions import Collection, VersionsService
+
+# Order of the versions in tokens and cursors.
+COLLECTIONS = (Collection.PLACES, Collection.ITEMS)
+
+# Changed rows, then deletions, of each collection. Places come first, so that
+# clients see the places before the items that refer to them.
+STAGES = (
+    (Collection.PLACES, False),
+    (Collection.PLACES, True),
+    (Collection.ITEMS, False),
+    (Collection.ITEMS, True),
+)
+
+ROW_SCHEMAS: dict[Collection, tuple[type[Place | Item], type[Any]]] = {
+    Collection.PLACES: (Place, PlaceRLSchema),
+    Collection.ITEMS: (Item, ItemRLSchema),
+}
+
+# Version of the collections in a full sync, which skips deletions.
+FULL_SYNC = -1
+
+
+class SyncPosition(NamedTuple):
+    since: tuple[int, ...]
+    target: tuple[int, ...] | None = None
+    issued_at: int = 0
+    stage: int = 0
+    key: tuple[int, int] | None = None
+
+
+class SyncService:
+    """
+    Changes of the user's places and items since a sync token.
+
+    Every change is stamped with the version of its collection, see
+    `VersionsService`, and deleted rows leave a `Tombstone`. The token holds
+    the versions the client has synced to, so a sync reads only the rows with
+    newer versions from the `(owner_uid, version, uid)` indexes, and its cost
+    grows with the number of changes instead of with the size of the data.
+    """
+
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        user_uid: int,
+    ):
+        self.db_session = db_session
+        self.user_uid = user_uid
+
+    @staticmethod
+    def decode_token(token: str | None) -> SyncPosition:
+        if token is None:
+            return SyncPosition(since=(FULL_SYNC,) * len(COLLECTIONS))
+        *since, issued_at = decode_ints(token, len(COLLECTIONS) + 1)
+        if issued_at < time.time() - settings.SYNC_TOKEN_TTL_SECONDS:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync token expired, sync from scratch",
+            )
+        return SyncPosition(since=tuple(since))
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> SyncPosition:
+        size = len(COLLECTIONS)
+        values = decode_ints(cursor, 2 * size + 4)
+        stage = values[2 * size + 1]
+        if not 0 <= stage < len(STAGES):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        return SyncPosition(
+            since=tuple(values[:size]),
+            target=tuple(values[size : 2 * size]),
+            issued_at=values[2 * size],
+            stage=stage,
+            key=(values[-2], values[-1]),
+        )
+
+    async def get_changes(
+        self,
+        position: SyncPosition,
+        limit: int,
+    ) -> AsyncGenerator[SyncChangeSchema | SyncEndSchema]:
+        """
+        Streams up to `limit` changes from `position`, ordered by collection
+        and version, followed by a `SyncEndSchema` with the cursor of the next
+        page, if the page is full, and the token of the next sync.
+        """
+
+        target, issued_at = position.target, position.issued_at
+        if target is None:
+            # Read before the rows, so that every row stamped with a version
+            # up to the target is visible to the queries below.
+            versions = await VersionsService(
+                self.db_session,
+                self.user_uid,
+            ).load_versions()
+            issued_at = int(time.time())
+            # A lagging replica must not move the client's token back.
+            target = tuple(
+                max(since, versions.get(collection, 0))
+                for since, collection in zip(position.since, COLLECTIONS, strict=True)
+            )
+        token = KeysetPagination.encode_cursor([*target, issued_at])
+
+        remaining = limit
+        for stage in range(position.stage, len(STAGES)):
+            collection, deleted = STAGES[stage]
+            index = COLLECTIONS.index(collection)
+            since = position.since[index]
+            if deleted and since == FULL_SYNC:
+                continue
+            stmt = (
+                self.get_deletions_stmt(collection)
+                if deleted
+                else self.get_rows_stmt(collection)
+            )
+            version, uid = stmt.selected_columns.version, stmt.selected_columns.uid
+            stmt = stmt.filter(version > since, version <= target[index])
+            if stage == position.stage and position.key:
+                stmt = stmt.filter(tuple_(version, uid) > tuple_(*position.key))
+            stmt = stmt.order_by(version, uid).limit(remaining)
+
+            key = None
+            async for row in await self.db_session.stream(stmt):
+                yield self.to_change_schema(collection, deleted, row)
+                key = (row.version, row.uid)
+                remaining -= 1
+            if not remaining and key:
+                yield SyncEndSchema(
+                    token=token,
+                    cursor=KeysetPagination.encode_cursor(
+                        [*position.since, *target, issued_at, stage, *key],
+                    ),
+                )
+                return
+        yield SyncEndSchema(token=token)
+
+    def get_rows_stmt(self, collection: Collection) -> Select[*tuple[Any, ...]]:
+        model, schema = ROW_SCHEMAS[collection]
+        return select(
+            *(getattr(model, name) for name in schema.model_fields),
+            model.version,
+            model.updated_at,
+        ).filter(
+            model.owner_uid == self.user_uid,
+        )
+
+    def get_deletions_stmt(self, collection: Collection) -> Select[*tuple[Any, ...]]:
+        return select(
+            Tombstone.uid,
+            Tombstone.version,
+            Tombstone.deleted_at.label("updated_at"),
+        ).filter(
+            Tombstone.owner_uid == self.user_uid,
+            Tombstone.collection == collection,
+        )
+
+    @staticmethod
+    def to_change_schema(
+        collection: Collection,
+        deleted: bool,
+        row: Any,
+    ) -> SyncChangeSchema:
+        return SyncChangeSchema(
+            collection=collection,
+            uid=row.uid,
+            version=row.version,
+            updated_at=row.updated_at,
+            data=None
+            if deleted
+            else ROW_SCHEMAS[collection][1].model_validate(row, from_attributes=True),
+        )
+
+
+class TombstonesService:
+    def __init__(
+        self,
+        db_session: AsyncSession,
+    ):
+        self.db_session = db_session
+
+    async def prune(self, retention: timedelta | None = None) -> int:
+        """
+        Deletes tombstones older than `retention`, by default a day longer
+        than sync tokens live, which covers the transactions that were still
+        open when a token was issued.
+
+        Returns:
+            int: Number of deleted tombstones.
+        """
+
+        if retention is None:
+            retention = timedelta(seconds=settings.SYNC_TOKEN_TTL_SECONDS, days=1)
+        result = await self.db_session.scalars(
+            delete(Tombstone)
+            .filter(Tombstone.deleted_at < utcdatetime.now() - retention)
+            .returning(Tombstone.uid)
+        )
+        return len(result.all())
+
+
+def decode_ints(value: str, size: int) -> list[int]:
+    values = KeysetPagination.decode_cursor(value, size)
+    if not all(type(part) is int for part in values):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return values
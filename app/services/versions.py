@@ -0,0 +1,127 @@
+from enum import StrEnum
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import cache, invalidate_on_commit, versions_key
+from app.database import get_session
+from app.models.collection_version import CollectionVersion
+from app.models.tombstone import Tombstone
+
+VERSIONS_ADAPTER = TypeAdapter(dict[str, int])
+
+# `Session.info` key of the versions bumped by the current transaction.
+BUMPED_VERSIONS = "bumped_versions"
+
+
+class Collection(StrEnum):
+    PLACES = "places"
+    ITEMS = "items"
+
+
+class VersionsService:
+    """
+    Per-user version counters of collections. Every transaction that changes
+    a collection bumps its counter, so an unchanged counter means unchanged
+    data. Clients see them as ETags, see `app.dependencies.etag`, and as sync
+    tokens, see `app.services.sync`.
+
+    Changed rows are stamped with the bumped version. The bump locks the
+    counter until commit, so the transactions changing a collection of a user
+    commit in the order of their versions, and a reader that has seen version
+    N has also seen every row stamped with N or less.
+    """
+
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        user_uid: int,
+    ):
+        self.db_session = db_session
+        self.user_uid = user_uid
+
+    async def bump(self, collection: Collection) -> int:
+        """
+        Bumps the counter once per transaction, later calls return the same
+        version. A transaction that bumps several collections bumps places
+        first, so that concurrent transactions do not deadlock on the counters.
+
+        Returns:
+            int: Version to stamp the changed rows with.
+        """
+
+        bumped: dict[tuple[int, Collection], int] = self.db_session.info.setdefault(
+            BUMPED_VERSIONS,
+            {},
+        )
+        if (self.user_uid, collection) in bumped:
+            return bumped[self.user_uid, collection]
+        stmt = insert(CollectionVersion).values(
+            owner_uid=self.user_uid,
+            collection=collection,
+            version=1,
+        )
+        result = await self.db_session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    CollectionVersion.owner_uid,
+                    CollectionVersion.collection,
+                ],
+                set_={"version": CollectionVersion.version + 1},
+            ).returning(CollectionVersion.version)
+        )
+        version: int = result.scalar_one()
+        bumped[self.user_uid, collection] = version
+        invalidate_on_commit(self.db_session.info, versions_key(self.user_uid))
+        return version
+
+    async def add_tombstone(self, collection: Collection, uid: int) -> None:
+        """
+        Records the deletion of a row for the clients that sync the collection.
+        """
+
+        self.db_session.add(
+            Tombstone(
+                collection=collection,
+                uid=uid,
+                owner_uid=self.user_uid,
+                version=await self.bump(collection),
+            )
+        )
+
+    async def get_versions(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The cached versions of the collections, which are
+            loaded on the primary whatever the session of the service.
+        """
+
+        return await cache.get_or_load(
+            versions_key(self.user_uid),
+            VERSIONS_ADAPTER,
+            self._load_primary_versions,
+        )
+
+    async def _load_primary_versions(self) -> dict[str, int]:
+        async with get_session() as db_session:
+            return await VersionsService(db_session, self.user_uid).load_versions()
+
+    async def load_versions(self) -> dict[str, int]:
+        rows = await self.db_session.execute(
+            select(
+                CollectionVersion.collection,
+                CollectionVersion.version,
+            ).filter(
+                CollectionVersion.owner_uid == self.user_uid,
+            )
+        )
+        return dict(rows.tuples().all())
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def forget_bumped_versions(session: Session) -> None:
+    session.info.pop(BUMPED_VERSIONS, None)
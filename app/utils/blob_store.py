@@ -0,0 +1,109 @@
+import hashlib
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+from uuid import uuid4
+
+import aiofiles
+from anyio import Path
+
+from app.schemas.blob import BlobDTO
+from app.utils.mime_sniffer import SNIFF_SIZE, sniff_media_type
+
+
+class BlobTooLargeError(ValueError):
+    pass
+
+
+class StagedBlob(NamedTuple):
+    blob: BlobDTO
+    tmp_path: Path
+
+
+class BlobStore:
+    """
+    Content-addressed file storage.
+
+    Every blob is stored once under its SHA-256, sharded by the first two
+    bytes of the hash: `<root>/ab/cd/abcd...`. Uploads are staged in a
+    temporary file while being hashed, and `place` moves them in place
+    unless a blob with the same hash already exists. The temporary directory
+    lives under the same root, so moving a blob in place is an atomic rename
+    on one filesystem.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def get_path(self, blob_hash: str) -> Path:
+        return self.root.joinpath(blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    @asynccontextmanager
+    async def stage(
+        self,
+        chunks: AsyncIterable[bytes],
+        max_size: int | None = None,
+    ) -> AsyncIterator[StagedBlob]:
+        """
+        Writes `chunks` to a temporary file, hashing them and sniffing the
+        media type from the leading bytes in the same pass. The temporary file
+        is removed on exit, unless `place` has moved it in place.
+
+        Raises:
+            BlobTooLargeError: The content exceeds `max_size` bytes; nothing is
+            left behind in the store.
+        """
+
+        tmp_dir = self.root.joinpath("tmp")
+        await tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = tmp_dir.joinpath(uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        try:
+            async with aiofiles.open(tmp_path, mode="wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise BlobTooLargeError(
+                            f"Content exceeds {max_size} bytes",
+                        )
+                    if len(head) < SNIFF_SIZE:
+                        head += chunk[: SNIFF_SIZE - len(head)]
+                    digest.update(chunk)
+                    await f.write(chunk)
+            yield StagedBlob(
+                blob=BlobDTO(
+                    hash=digest.hexdigest(),
+                    size=size,
+                    media_type=sniff_media_type(head) or "application/octet-stream",
+                ),
+                tmp_path=tmp_path,
+            )
+        finally:
+            await tmp_path.unlink(missing_ok=True)
+
+    async def place(self, staged: StagedBlob) -> None:
+        """
+        Moves a staged blob in place, unless its file already exists.
+        """
+
+        path = self.get_path(staged.blob.hash)
+        if await path.exists():
+            return
+        await path.parent.mkdir(parents=True, exist_ok=True)
+        await staged.tmp_path.replace(path)
+
+    def get_variant_path(self, blob_hash: str, variant: str) -> Path:
+        """
+        Returns:
+            Path: The path of a derived rendition, stored next to the blob.
+        """
+
+        return self.get_path(blob_hash).with_name(f"{blob_hash}.{variant}.webp")
+
+    async def delete(self, blob_hash: str) -> None:
+        path = self.get_path(blob_hash)
+        await path.unlink(missing_ok=True)
+        async for variant_path in path.parent.glob(f"{blob_hash}.*"):
+            await variant_path.unlink(missing_ok=True)
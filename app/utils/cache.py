@@ -0,0 +1,172 @@
+"""
+Cache of JSON-serialized values, kept in process or in a shared server that
+speaks the Redis protocol.
+
+`LocalCache` is an LRU of its own in every worker. `RedisCache` works with
+Redis or a compatible server (Valkey, KeyDB, `fakeredis` in tests) shared by
+all workers, so a deleted key is gone for every worker at once. Both store
+bytes, so callers never share a cached object.
+
+Reads go through `Cache.get_or_load`, which calls the loader on a miss and
+stores its result for `ttl` seconds. Errors of the Redis server are logged
+and treated as misses, so requests fall back to the loader while it is down.
+
+    Example:
+        cache = Cache(LocalCache(maxsize=1000), prefix="flea:", ttl=300)
+        uids = await cache.get_or_load("units", TypeAdapter(frozenset[int]), load)
+        await cache.delete(["units"])
+
+"""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable, Collection
+from typing import Protocol, cast
+
+from prometheus_client import Counter
+from pydantic import TypeAdapter
+
+from app.utils.lru_cache import LRUCache
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Optional, see the "redis" extra.
+    redis = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Cache lookups by key kind and result.",
+    ["kind", "result"],
+)
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, keys: Collection[str]) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class LocalCache:
+    def __init__(self, maxsize: int):
+        self._data: LRUCache[str, bytes] = LRUCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data.set(key, value, expires_at=time.time() + ttl)
+
+    async def delete(self, keys: Collection[str]) -> None:
+        for key in keys:
+            self._data.delete(key)
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisCache:
+    def __init__(self, client: "redis.Redis"):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        if redis is None:
+            raise RuntimeError(
+                "A Redis cache URL needs the redis package, "
+                "install the project with the redis extra"
+            )
+        return cls(redis.Redis.from_url(url))
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            # Responses are not decoded, they stay bytes.
+            return cast("bytes | None", await self.client.get(key))
+        except (redis.RedisError, OSError):
+            logger.warning("Cache read of %s failed", key, exc_info=True)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.client.set(key, value, px=int(ttl * 1000))
+        except (redis.RedisError, OSError):
+            logger.warning("Cache write of %s failed", key, exc_info=True)
+
+    async def delete(self, keys: Collection[str]) -> None:
+        try:
+            await self.client.delete(*keys)
+        except (redis.RedisError, OSError):
+            # The keys stay stale until they expire.
+            logger.error("Cache invalidation of %s failed", keys, exc_info=True)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class Cache:
+    def __init__(self, backend: CacheBackend, prefix: str, ttl: float):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+
+    async def get_or_load[T](
+        self,
+        key: str,
+        adapter: TypeAdapter[T],
+        load: Callable[[], Awaitable[T]],
+    ) -> T:
+        kind = key.partition(":")[0]
+        data = await self.backend.get(self.prefix + key)
+        if data is not None:
+            CACHE_LOOKUPS.labels(kind, "hit").inc()
+            return adapter.validate_json(data)
+        CACHE_LOOKUPS.labels(kind, "miss").inc()
+        value = await load()
+        await self.backend.set(self.prefix + key, adapter.dump_json(value), self.ttl)
+        return value
+
+    async def get[T](self, key: str, adapter: TypeAdapter[T]) -> T | None:
+        data = await self.backend.get(self.prefix + key)
+        return None if data is None else adapter.validate_json(data)
+
+    async def set[T](
+        self,
+        key: str,
+        adapter: TypeAdapter[T],
+        value: T,
+        ttl: float | None = None,
+    ) -> None:
+        await self.backend.set(
+            self.prefix + key,
+            adapter.dump_json(value),
+            self.ttl if ttl is None else ttl,
+        )
+
+    async def delete(self, keys: Collection[str]) -> None:
+        if keys:
+            await self.backend.delete([self.prefix + key for key in keys])
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_cache(
+    url: str | None,
+    *,
+    local_size: int,
+    prefix: str,
+    ttl: float,
+) -> Cache:
+    """
+    Cache in the Redis-compatible server at `url`, or in process without one.
+    """
+
+    backend: CacheBackend = (
+        RedisCache.from_url(url) if url else LocalCache(maxsize=local_size)
+    )
+    return Cache(backend, prefix=prefix, ttl=ttl)
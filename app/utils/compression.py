@@ -0,0 +1,203 @@
+"""
+Content-Encoding negotiation and streaming compressors for zstd, br and gzip.
+
+"""
+
+import os
+import zlib
+from collections.abc import Callable
+from typing import NamedTuple, Protocol
+from uuid import uuid4
+
+import brotli
+import zstandard
+from anyio import Path
+
+from app.config import settings
+
+# Media types that are already compressed or do not shrink.
+INCOMPRESSIBLE_MEDIA_TYPES = frozenset(
+    (
+        "application/gzip",
+        "application/octet-stream",
+        "application/pdf",
+        "application/vnd.rar",
+        "application/x-7z-compressed",
+        "application/zip",
+        "application/zstd",
+        "text/event-stream",
+    )
+)
+COMPRESSIBLE_MEDIA_PREFIXES = ("image/svg", "font/")
+INCOMPRESSIBLE_MEDIA_PREFIXES = ("image/", "video/", "audio/")
+# Suffixes of precompressed sibling files.
+ENCODING_SUFFIXES = {
+    "zstd": ".zst",
+    "br": ".br",
+    "gzip": ".gz",
+}
+
+
+class Compressor(Protocol):
+    """
+    Streaming compressor. `flush` returns everything buffered so far while
+    keeping the stream open; `finish` ends it.
+    """
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, wbits=zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)  # type: ignore[no-any-return]
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()  # type: ignore[no-any-return]
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()  # type: ignore[no-any-return]
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK,
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class Codec(NamedTuple):
+    factory: Callable[[int], Compressor]
+    level: int
+    precompress_level: int
+
+
+# Encodings in order of server preference.
+CODECS: dict[str, Codec] = {
+    "zstd": Codec(ZstdCompressor, settings.ZSTD_LEVEL, 19),
+    "br": Codec(BrotliCompressor, settings.BROTLI_QUALITY, 11),
+    "gzip": Codec(GzipCompressor, settings.GZIP_LEVEL, 9),
+}
+
+
+def negotiate_encoding(
+    accept_encoding: str | None,
+    encodings: list[str] | None = None,
+) -> str | None:
+    """
+    Picks the content coding for an `Accept-Encoding` header.
+
+    Returns:
+        str | None: The acceptable coding with the highest client weight, ties
+        broken by server preference; None if no coding is acceptable.
+    """
+
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    candidates = [
+        (weights.get(encoding, weights.get("*", 0.0)), -index, encoding)
+        for index, encoding in enumerate(CODECS if encodings is None else encodings)
+    ]
+    weight, _, encoding = max(candidates, default=(0.0, 0, ""))
+    return encoding if weight > 0 else None
+
+
+def is_compressible(media_type: str | None) -> bool:
+    if not media_type:
+        return False
+    media_type = media_type.split(";")[0].strip().lower()
+    if media_type.startswith(COMPRESSIBLE_MEDIA_PREFIXES):
+        return True
+    return not (
+        media_type in INCOMPRESSIBLE_MEDIA_TYPES
+        or media_type.startswith(INCOMPRESSIBLE_MEDIA_PREFIXES)
+    )
+
+
+def get_compressor(encoding: str) -> Compressor:
+    codec = CODECS[encoding]
+    return codec.factory(codec.level)
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    compressor = get_compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def get_precompressed_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+
+
+def precompress_file(path: str) -> list[str]:
+    """
+    Writes a sibling file compressed at the highest level for every available
+    encoding, unless it comes out larger than `PRECOMPRESS_MIN_RATIO` of the
+    original. Blocking; meant to be run in a worker thread.
+
+    Returns:
+        list[str]: The encodings that were written.
+    """
+
+    size = os.path.getsize(path)
+    written = []
+    for encoding, codec in CODECS.items():
+        target = path + ENCODING_SUFFIXES[encoding]
+        tmp_target = f"{target}.{uuid4().hex}.tmp"
+        compressor = codec.factory(codec.precompress_level)
+        compressed_size = 0
+        try:
+            with open(path, "rb") as src, open(tmp_target, "wb") as dst:
+                while chunk := src.read(settings.FILE_CHUNK_SIZE):
+                    compressed_size += dst.write(compressor.compress(chunk))
+                compressed_size += dst.write(compressor.finish())
+            if compressed_size > size * settings.PRECOMPRESS_MIN_RATIO:
+                os.remove(tmp_target)
+                continue
+            os.replace(tmp_target, target)
+        except BaseException:
+            if os.path.exists(tmp_target):
+                os.remove(tmp_target)
+            raise
+        written.append(encoding)
+    return written
@@ -1,41 +1,56 @@
 import mimetypes
 import os
+import stat
 from collections.abc import AsyncGenerator
-from typing import Literal
+from contextlib import suppress
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Literal
 from urllib.parse import quote
 
 import aiofiles
 import aiofiles.os
-from anyio import Path
+from anyio import Path, open_file
+from fastapi import Request, Response, status
+from starlette.background import BackgroundTask
+from starlette.types import Receive, Scope, Send
+
+from app.config import settings
+from app.utils.compression import is_compressible
+
+ZEROCOPY_SEND_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
 
 
 class FileStreamer:
     """
-    Class for streaming a file in chunks from a given file path.
+    Class for streaming a file in chunks from a given file path. Built with
+    `FileStreamer.create`, which stats the file off the event loop.
     """
 
     def __init__(  # noqa: PLR0913
         self,
-        filepath: str | Path,
+        filepath: Path,
+        stat_result: os.stat_result,
+        *,
         read_mode: Literal["r", "rb"] = "rb",
-        chunk_size: int = 1024,
+        chunk_size: int | None = None,
         with_cleanup: bool = False,
         filename: str | None = None,
         mime_type: str | None = None,
         encoding: str | None = None,
+        content_encoding: str | None = None,
     ):
-        if not isinstance(filepath, Path):
-            filepath = Path(filepath)
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"File not found: {filepath}")
-        if not os.path.isfile(filepath):
-            raise ValueError(f"Path is not a file: {filepath}")
         if filename is None:
             filename = filepath.name
         self.filename = filename
         self.filepath = filepath
-        self.chunk_size = chunk_size
+        self.chunk_size = chunk_size or settings.FILE_CHUNK_SIZE
         self.with_cleanup = with_cleanup
+        self.size = stat_result.st_size
+        self.mtime = stat_result.st_mtime
         if not mime_type or not encoding:
             _mime_type, _encoding = mimetypes.guess_type(self.filepath.name)
             mime_type = (
@@ -47,9 +62,50 @@ class FileStreamer:
         self._content_disposition = (
             f"attachment; filename*={self._encoding}''{quote(self.filename)}"
         )
+        self._etag = f'"{stat_result.st_mtime_ns:x}-{self.size:x}"'
+        # Whether the response depends on `Accept-Encoding`: the file is either
+        # a precompressed copy or may be compressed by `CompressionMiddleware`.
+        self.negotiable = content_encoding is not None or is_compressible(
+            self._media_type
+        )
+        if (
+            content_encoding is None
+            and self.negotiable
+            and self.size >= settings.COMPRESSION_MINIMUM_SIZE
+        ):
+            # Compressed on the fly the body differs byte for byte, so the
+            # tag is weak whatever the encoding, and 200 and 304 responses
+            # carry the same one.
+            self._etag = f"W/{self._etag}"
+        self._last_modified = formatdate(self.mtime, usegmt=True)
         self.read_mode = read_mode
+        self.content_encoding = content_encoding
+
+    @classmethod
+    async def create(cls, filepath: str | Path, **options: Any) -> "FileStreamer":
+        """
+        Stats the file without blocking the event loop and returns its
+        streamer, see `__init__` for the `options`.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the path is not a regular file.
+        """
 
-    async def get_stream(self) -> AsyncGenerator[str | bytes, None]:
+        filepath = Path(filepath)
+        try:
+            stat_result = await filepath.stat()
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"File not found: {filepath}") from e
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise ValueError(f"Path is not a file: {filepath}")
+        return cls(filepath, stat_result, **options)
+
+    async def get_stream(
+        self,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> AsyncGenerator[str | bytes, None]:
         """
         Asynchronously reads the file in chunks and yields each chunk as a string.
 
@@ -58,24 +114,158 @@ class FileStreamer:
 
         This function opens the file specified by `self.filepath` in read mode and
         reads it using the specified `self.chunk_size`. It continuously reads and
-        yields chunks of the file until the end of the file is reached.
+        yields chunks of the file until the end of the file is reached, or until
+        `length` bytes starting at `offset` have been read.
         """
 
+        remaining = self.size - offset if length is None else length
         try:
             async with aiofiles.open(
                 file=self.filepath,
                 encoding=self._encoding if self.read_mode == "r" else None,
                 mode=self.read_mode,
             ) as f:
-                while True:
-                    chunk = await f.read(self.chunk_size)
+                if offset:
+                    await f.seek(offset)
+                while remaining > 0:
+                    chunk = await f.read(min(self.chunk_size, remaining))
                     if not chunk:
                         break
+                    remaining -= len(chunk)
                     yield chunk
         finally:
-            if self.with_cleanup:
+            await self.cleanup()
+
+    async def cleanup(self) -> None:
+        """
+        Removes the file if the streamer was created `with_cleanup`. Called
+        once the response is sent, whatever its status.
+        """
+
+        if self.with_cleanup:
+            with suppress(FileNotFoundError):
                 await aiofiles.os.remove(self.filepath)
 
+    def get_response(self, request: Request) -> Response:
+        """
+        Builds a response for `request`, honouring conditional (`If-None-Match`,
+        `If-Modified-Since`) and single-range (`Range`, `If-Range`) requests.
+
+        Returns:
+            Response: 200 with the whole file, 206 with the requested range,
+            304 if the client copy is fresh or 416 if the range is unsatisfiable.
+        """
+
+        headers = {
+            "Accept-Ranges": "bytes" if self.read_mode == "rb" else "none",
+            "Content-Disposition": self.content_disposition,
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+        }
+        if self.negotiable:
+            headers["Vary"] = "Accept-Encoding"
+        if self.content_encoding:
+            # The file is a precompressed copy of the content.
+            headers["Content-Encoding"] = self.content_encoding
+        if self.is_not_modified(request):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=headers,
+                background=BackgroundTask(self.cleanup),
+            )
+
+        http_range = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if (
+            self.read_mode != "rb"
+            or http_range is None
+            or (if_range is not None and not self.is_range_fresh(if_range))
+        ):
+            return FileStreamResponse(self, headers=headers)
+
+        try:
+            byte_range = self.parse_range(http_range)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{self.size}"},
+                background=BackgroundTask(self.cleanup),
+            )
+        if byte_range is None:
+            return FileStreamResponse(self, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{self.size}"
+        return FileStreamResponse(
+            self,
+            offset=start,
+            length=end - start + 1,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            headers=headers,
+        )
+
+    def is_not_modified(self, request: Request) -> bool:
+        if if_none_match := request.headers.get("if-none-match"):
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+        if if_modified_since := request.headers.get("if-modified-since"):
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+    def is_range_fresh(self, if_range: str) -> bool:
+        """
+        Returns:
+            bool: Whether `If-Range` matches the file. Entity tags are compared
+            strongly, so a weak tag never matches (RFC 9110, section 13.1.5).
+        """
+
+        if if_range == self.last_modified:
+            return True
+        return not self.etag.startswith("W/") and if_range == self.etag
+
+    def parse_range(self, http_range: str) -> tuple[int, int] | None:
+        """
+        Parses a single `bytes=` range into inclusive `(start, end)` offsets
+        within the file, following RFC 9110, section 14.1.2.
+
+        Returns:
+            tuple[int, int] | None: The range, or None if the header is
+            malformed, invalid (such as `bytes=5-3`) or asks for several
+            ranges, in which case the whole file is sent.
+
+        Raises:
+            RangeNotSatisfiableError: If the range starts past the end of the
+            file or is a zero-length suffix (`bytes=-0`).
+        """
+
+        unit, _, ranges = http_range.partition("=")
+        if unit.strip().lower() != "bytes" or "," in ranges:
+            return None
+        first, separator, last = ranges.strip().partition("-")
+        if (
+            not separator
+            or not (first or last)
+            or not all(is_digits(part) for part in (first, last) if part)
+            or (first and last and int(last) < int(first))
+        ):
+            return None
+        if not self.size:
+            # No range of an empty file can be sent as 206.
+            return None
+        if not first:
+            suffix = int(last)
+            if not suffix:
+                raise RangeNotSatisfiableError
+            return max(self.size - suffix, 0), self.size - 1
+        start = int(first)
+        if start >= self.size:
+            raise RangeNotSatisfiableError
+        end = int(last) if last else self.size - 1
+        return start, min(end, self.size - 1)
+
     @property
     def content_disposition(self) -> str:
         """
@@ -102,3 +292,96 @@ class FileStreamer:
         """
 
         return self._media_type
+
+    @property
+    def etag(self) -> str:
+        """
+        Returns:
+            str: The entity tag built from the file modification time and size,
+            weak if the file may be compressed on the fly.
+        """
+
+        return self._etag
+
+    @property
+    def last_modified(self) -> str:
+        """
+        Returns:
+            str: The modification time of the file as an HTTP date.
+        """
+
+        return self._last_modified
+
+
+class FileStreamResponse(Response):
+    """
+    Sends (a range of) a file streamed by `FileStreamer`.
+
+    When the ASGI server supports the zero-copy send extension, the file is
+    handed over as a descriptor and the server uses `sendfile`; otherwise it is
+    read in `FileStreamer.chunk_size` chunks.
+    """
+
+    def __init__(
+        self,
+        streamer: FileStreamer,
+        offset: int = 0,
+        length: int | None = None,
+        status_code: int = status.HTTP_200_OK,
+        headers: dict[str, str] | None = None,
+    ):
+        self.streamer = streamer
+        self.offset = offset
+        self.length = streamer.size - offset if length is None else length
+        self.status_code = status_code
+        self.media_type = streamer.media_type
+        self.background = None
+        self.init_headers(headers)
+        if streamer.read_mode == "rb":
+            self.headers["Content-Length"] = str(self.length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if scope["method"] == "HEAD":
+                await send({"type": "http.response.body", "body": b""})
+            elif (
+                ZEROCOPY_SEND_EXTENSION in scope.get("extensions", {})
+                and self.streamer.read_mode == "rb"
+            ):
+                # Opened and closed in a worker thread, off the event loop.
+                async with await open_file(self.streamer.filepath, "rb") as f:
+                    await send(
+                        {
+                            "type": ZEROCOPY_SEND_EXTENSION,
+                            "file": f.wrapped,
+                            "offset": self.offset,
+                            "count": self.length,
+                            "more_body": False,
+                        }
+                    )
+            else:
+                async for chunk in self.streamer.get_stream(self.offset, self.length):
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk.encode(self.streamer.encoding)
+                            if isinstance(chunk, str)
+                            else chunk,
+                            "more_body": True,
+                        }
+                    )
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await self.streamer.cleanup()
+
+
+def is_digits(value: str) -> bool:
+    # `int` also accepts signs, underscores, spaces and non-ASCII digits.
+    return value.isascii() and value.isdigit()
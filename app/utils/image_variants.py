@@ -0,0 +1,211 @@
+"""
+Downscaled WebP variants of uploaded images.
+
+Rendering runs in a process pool: decoding and resampling large photos is
+CPU-bound and would otherwise compete with request handling for the GIL.
+
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, NamedTuple
+from uuid import uuid4
+
+from anyio import Path
+from PIL import Image, ImageOps
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+type Variant = Literal["thumbnail", "preview"]
+
+IMAGE_MEDIA_TYPES = frozenset(
+    (
+        "image/jpeg",
+        "image/png",
+        "image/gif",
+        "image/webp",
+        "image/bmp",
+        "image/tiff",
+    )
+)
+VARIANT_MEDIA_TYPE = "image/webp"
+
+IMAGE_VARIANTS_QUEUE_DEPTH = Gauge(
+    "image_variants_queue_depth",
+    "Image variants waiting to be rendered in the background.",
+    multiprocess_mode="livesum",
+)
+
+
+class VariantSpec(NamedTuple):
+    size: int
+    crop: bool
+    quality: int
+
+
+def render_variant(
+    source: str,
+    target: str,
+    spec: VariantSpec,
+) -> None:
+    """
+    Renders `source` into a WebP image no larger than `spec.size` square, or
+    exactly that square if `spec.crop` is set. The result is written to a
+    temporary file and renamed, so readers never see a partial image.
+    """
+
+    with Image.open(source) as image:
+        # Lets the JPEG decoder downscale by up to 8x while decoding.
+        image.draft("RGB", (spec.size, spec.size))
+        variant = ImageOps.exif_transpose(image)
+        if spec.crop:
+            variant = ImageOps.fit(variant, (spec.size, spec.size))
+        else:
+            variant.thumbnail((spec.size, spec.size))
+        if variant.mode not in ("RGB", "RGBA"):
+            variant = variant.convert(
+                "RGBA" if variant.has_transparency_data else "RGB",
+            )
+        tmp_target = f"{target}.{uuid4().hex}.tmp"
+        try:
+            variant.save(tmp_target, "WEBP", quality=spec.quality)
+            os.replace(tmp_target, target)
+        except BaseException:
+            if os.path.exists(tmp_target):
+                os.remove(tmp_target)
+            raise
+
+
+class ImageVariantsWorker:
+    """
+    Renders image variants in the background.
+
+    `schedule` queues all variants of a freshly uploaded image without
+    waiting; `get_variant` renders a missing variant on demand. Both share
+    the in-flight renders, so a variant is never rendered twice at once.
+    """
+
+    def __init__(
+        self,
+        specs: dict[Variant, VariantSpec],
+        max_workers: int,
+        queue_size: int,
+    ):
+        self.specs = specs
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._queue: asyncio.Queue[tuple[Path, Path, Variant]] | None = None
+        self._executor: ProcessPoolExecutor | None = None
+        self._consumers: list[asyncio.Task[None]] = []
+        self._rendering: dict[Path, asyncio.Future[None]] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._consumers = [
+            asyncio.create_task(self._consume(self._queue))
+            for _ in range(self.max_workers)
+        ]
+
+    async def stop(self) -> None:
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        self._queue = None
+        IMAGE_VARIANTS_QUEUE_DEPTH.set(0)
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def schedule(
+        self,
+        source: Path,
+        targets: dict[Variant, Path],
+    ) -> None:
+        """
+        Queues the rendering of `targets`. When the worker is not running or
+        its queue is full the variants are skipped; they are rendered on first
+        request instead.
+        """
+
+        if self._queue is None:
+            return
+        for variant, target in targets.items():
+            try:
+                self._queue.put_nowait((source, target, variant))
+            except asyncio.QueueFull:
+                logger.warning("Image variants queue is full, skipping %s", target)
+                return
+            finally:
+                # Set on change, like the password hasher gauges, since a
+                # scrape cannot read it from the other processes.
+                IMAGE_VARIANTS_QUEUE_DEPTH.set(self.queue_depth)
+
+    async def get_variant(
+        self,
+        source: Path,
+        target: Path,
+        variant: Variant,
+    ) -> bool:
+        """
+        Returns:
+            bool: Whether `target` exists, rendering it first if needed.
+        """
+
+        if await target.exists():
+            return True
+        try:
+            await self._render(source, target, variant)
+        except Exception:
+            logger.exception("Failed to render %s", target)
+            return False
+        return True
+
+    async def _consume(
+        self,
+        queue: asyncio.Queue[tuple[Path, Path, Variant]],
+    ) -> None:
+        while True:
+            source, target, variant = await queue.get()
+            IMAGE_VARIANTS_QUEUE_DEPTH.set(queue.qsize())
+            try:
+                if not await target.exists():
+                    await self._render(source, target, variant)
+            except Exception:
+                logger.exception("Failed to render %s", target)
+            finally:
+                queue.task_done()
+
+    async def _render(
+        self,
+        source: Path,
+        target: Path,
+        variant: Variant,
+    ) -> None:
+        if rendering := self._rendering.get(target):
+            return await asyncio.shield(rendering)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        rendering = asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            render_variant,
+            str(source),
+            str(target),
+            self.specs[variant],
+        )
+        self._rendering[target] = rendering
+        try:
+            await asyncio.shield(rendering)
+        finally:
+            self._rendering.pop(target, None)
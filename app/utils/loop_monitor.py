@@ -0,0 +1,94 @@
+"""
+Event-loop lag monitor.
+
+A task sleeps for `interval` in a loop and records how much later than that
+it wakes up: the time the loop spent running something else without
+yielding, such as a blocking call. A watchdog thread checks on the task, and
+while the loop has been stuck longer than `threshold` it logs the stack of
+the event-loop thread, which shows the blocking code itself.
+
+    Example:
+        Event loop blocked for over 0.412s, stack:
+          ...
+          File "app/api/reports.py", line 12, in get_report
+            time.sleep(0.5)
+
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a scheduled callback.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+LOOP_STALLS = Counter(
+    "event_loop_stalls",
+    "Times the event loop was blocked for longer than the threshold.",
+)
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._heartbeat = 0.0
+
+    def start(self) -> None:
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(),),
+            name="LoopMonitor",
+            daemon=True,
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            LOOP_LAG.observe(max(self._heartbeat - start - self.interval, 0))
+
+    def _watch(self, loop_thread_id: int) -> None:
+        reported = 0.0
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked <= self.threshold or heartbeat == reported:
+                continue
+            # Reported once per stall, while the blocking code is still running.
+            reported = heartbeat
+            LOOP_STALLS.inc()
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logger.warning(
+                "Event loop blocked for over %.3fs, stack:\n%s",
+                blocked,
+                stack,
+            )
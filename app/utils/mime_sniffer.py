@@ -0,0 +1,70 @@
+"""
+Content-based media type detection.
+
+Only the leading bytes of a file are inspected, so the type can be determined
+while an upload is still being streamed.
+
+"""
+
+SNIFF_SIZE = 512
+
+SIGNATURES: tuple[tuple[int, bytes, str], ...] = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"Rar!\x1a\x07", "application/vnd.rar"),
+    (0, b"\x28\xb5\x2f\xfd", "application/zstd"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),
+    (4, b"ftypheic", "image/heic"),
+    (4, b"ftypheix", "image/heic"),
+    (4, b"ftypavif", "image/avif"),
+    (4, b"ftypqt", "video/quicktime"),
+    (4, b"ftyp", "video/mp4"),
+)
+
+RIFF_SIGNATURES = {
+    b"WEBP": "image/webp",
+    b"WAVE": "audio/wav",
+    b"AVI ": "video/x-msvideo",
+}
+
+
+def sniff_media_type(head: bytes) -> str | None:
+    """
+    Returns:
+        str | None: The media type recognised from the first `SNIFF_SIZE`
+        bytes of the content, or None if it is not recognised.
+    """
+
+    if head.startswith(b"RIFF"):
+        return RIFF_SIGNATURES.get(head[8:12])
+    for offset, signature, media_type in SIGNATURES:
+        if head.startswith(signature, offset):
+            return media_type
+    if head.lstrip().lower().startswith((b"<svg", b"<?xml")) and b"<svg" in head:
+        return "image/svg+xml"
+    if head and is_text(head):
+        return "text/plain"
+    return None
+
+
+def is_text(head: bytes) -> bool:
+    if b"\x00" in head:
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may be cut at the end of the sample.
+        return e.start >= len(head) - 3
+    return True
@@ -0,0 +1,116 @@
+"""
+Streaming reader for single-file `multipart/form-data` uploads.
+
+Unlike `Request.form()`, which spools every part to a temporary file before the
+endpoint runs, the reader hands the file part's data over chunk by chunk while
+the body is still being received, so it can be written to its final location
+in a single pass.
+
+"""
+
+from collections.abc import AsyncGenerator, AsyncIterable
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartReader:
+    """
+    Iterating over the reader yields the data of the first file part of the
+    body. `filename` and `content_type` are set once the part headers have
+    been read, i.e. before the first chunk is yielded. Other parts are
+    skipped.
+
+        Example:
+            reader = MultipartReader(request.stream(), request.headers["content-type"])
+            blob = await blobs_service.store_blob(reader)
+            print(reader.filename)
+
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterable[bytes],
+        content_type: str,
+    ):
+        media_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise ValueError("Expected multipart/form-data with a boundary")
+        self.chunks = chunks
+        self.boundary = boundary
+        self.filename: str | None = None
+        self.content_type: str | None = None
+
+    async def __aiter__(self) -> AsyncGenerator[bytes]:
+        headers: dict[bytes, bytes] = {}
+        header_field = b""
+        header_value = b""
+        in_file = False
+        done = False
+        buffer: list[bytes] = []
+
+        def on_part_begin() -> None:
+            headers.clear()
+
+        def on_header_field(data: bytes, start: int, end: int) -> None:
+            nonlocal header_field
+            header_field += data[start:end]
+
+        def on_header_value(data: bytes, start: int, end: int) -> None:
+            nonlocal header_value
+            header_value += data[start:end]
+
+        def on_header_end() -> None:
+            nonlocal header_field, header_value
+            headers[header_field.lower()] = header_value
+            header_field = header_value = b""
+
+        def on_headers_finished() -> None:
+            nonlocal in_file
+            _, disposition = parse_options_header(
+                headers.get(b"content-disposition", b""),
+            )
+            if done or b"filename" not in disposition:
+                return
+            in_file = True
+            self.filename = disposition[b"filename"].decode("utf-8", "replace")
+            self.content_type = (
+                headers.get(b"content-type", b"").decode("latin-1") or None
+            )
+
+        def on_part_data(data: bytes, start: int, end: int) -> None:
+            if in_file:
+                buffer.append(data[start:end])
+
+        def on_part_end() -> None:
+            nonlocal in_file, done
+            if in_file:
+                in_file = False
+                done = True
+
+        parser = MultipartParser(
+            self.boundary,
+            callbacks={
+                "on_part_begin": on_part_begin,
+                "on_header_field": on_header_field,
+                "on_header_value": on_header_value,
+                "on_header_end": on_header_end,
+                "on_headers_finished": on_headers_finished,
+                "on_part_data": on_part_data,
+                "on_part_end": on_part_end,
+            },
+        )
+        async for chunk in self.chunks:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise ValueError(f"Malformed multipart body: {e}") from e
+            if buffer:
+                yield b"".join(buffer)
+                buffer.clear()
+            if done:
+                # The rest of the body is left unread.
+                break
+        if not done:
+            raise ValueError("Multipart body has no complete file part")
@@ -0,0 +1,95 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+from prometheus_client import Gauge
+
+PASSWORD_HASHER_IN_FLIGHT = Gauge(
+    "password_hasher_in_flight",
+    "Password hashing calls that have not finished yet.",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASHER_QUEUE_DEPTH = Gauge(
+    "password_hasher_queue_depth",
+    "Password hashing calls waiting for a free worker.",
+    multiprocess_mode="livesum",
+)
+
+
+class AsyncPasswordHasher:
+    """
+    Runs argon2 hashing in a bounded thread pool instead of on the event loop.
+
+    argon2-cffi releases the GIL while hashing, so threads give real
+    parallelism. `max_workers` caps the number of concurrent hashes; further
+    calls wait in the pool queue and are reported by `queue_depth`, which is
+    exported with the number of calls in flight as Prometheus gauges.
+    """
+
+    def __init__(
+        self,
+        hasher: PasswordHasher,
+        max_workers: int,
+    ):
+        self.hasher = hasher
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="argon2",
+        )
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Returns:
+            int: Number of submitted calls that have not finished yet.
+        """
+
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Returns:
+            int: Number of calls waiting for a free worker.
+        """
+
+        return max(self._in_flight - self.max_workers, 0)
+
+    async def _run[T](self, func: Callable[..., T], *args: str) -> T:
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        self._update_gauges()
+        future = self._executor.submit(func, *args)
+        # Counted until the job itself is done: a cancelled caller does not
+        # stop a hash that is already running.
+        future.add_done_callback(
+            lambda _future: loop.call_soon_threadsafe(self._finish),
+        )
+        return await asyncio.wrap_future(future)
+
+    def _finish(self) -> None:
+        self._in_flight -= 1
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        # Set on change rather than read on scrape, which would not work
+        # across the processes of a multiprocess setup.
+        PASSWORD_HASHER_IN_FLIGHT.set(self.in_flight)
+        PASSWORD_HASHER_QUEUE_DEPTH.set(self.queue_depth)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hasher.hash, password)
+
+    async def verify(self, hash: str, password: str) -> bool:
+        """
+        Raises:
+            argon2.exceptions.VerifyMismatchError: If the password does not match.
+        """
+
+        return await self._run(self.hasher.verify, hash, password)
+
+    def check_needs_rehash(self, hash: str) -> bool:
+        return self.hasher.check_needs_rehash(hash)
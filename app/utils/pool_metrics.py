@@ -0,0 +1,80 @@
+"""
+Prometheus metrics of SQLAlchemy connection pools.
+
+The pool is labelled with its `pool_logging_name`, so that several engines
+can share the metrics.
+
+    Example:
+        db_pool_wait_seconds_bucket{pool="primary",le="0.005"} 1523.0
+        db_pool_checked_out{pool="primary"} 3.0
+
+"""
+
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from sqlalchemy.pool.base import PoolProxiedConnection
+
+POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts",
+    "Connections checked out of the pool.",
+    ["pool"],
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts",
+    "Checkouts that gave up after waiting for the pool timeout.",
+    ["pool"],
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time to check out a connection, including opening a new one.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connections currently open by the pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    `AsyncAdaptedQueuePool` that records checkouts, the time spent waiting for
+    a connection and checkout timeouts.
+    """
+
+    @property
+    def name(self) -> str:
+        return self._orig_logging_name or "default"
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.name).inc()
+            raise
+        finally:
+            POOL_WAIT.labels(self.name).observe(time.perf_counter() - start)
+        POOL_CHECKOUTS.labels(self.name).inc()
+        self._update_gauges()
+        return connection
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        checked_out = self.checkedout()
+        POOL_CHECKED_OUT.labels(self.name).set(checked_out)
+        POOL_CONNECTIONS.labels(self.name).set(checked_out + self.checkedin())
@@ -0,0 +1,139 @@
+"""
+Counts SQL statements and the time spent executing them.
+
+Statements are added to the `QueryStats` found in the `query_stats` context
+variable, so every request can collect its own stats by setting it.
+
+`limit` caps the number of statements and `repeat_limit` the number of runs
+of one statement, which is how lazy loading in a loop (N+1) shows up. Strict
+stats raise `TooManyQueriesError` once a limit is exceeded, others log a
+warning.
+
+    Example:
+        token = query_stats.set(stats := QueryStats())
+        try:
+            await handle_request()
+        finally:
+            query_stats.reset(token)
+        print(stats.count, stats.duration)
+
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyQueriesError(Exception):
+    pass
+
+
+class QueryStats:
+    __slots__ = ("count", "duration", "limit", "repeat_limit", "repeats", "strict")
+
+    def __init__(
+        self,
+        limit: int | None = None,
+        repeat_limit: int | None = None,
+        strict: bool = False,
+    ):
+        self.count = 0
+        self.duration = 0.0
+        self.limit = limit
+        self.repeat_limit = repeat_limit
+        self.strict = strict
+        self.repeats: dict[str, int] = {}
+
+    def add(self, statement: str) -> None:
+        self.count += 1
+        repeats = self.repeats[statement] = self.repeats.get(statement, 0) + 1
+        if self.limit is not None and self.count == self.limit + 1:
+            self.exceeded(
+                f"More than {self.limit} SQL statements in one request",
+            )
+        if self.repeat_limit is not None and repeats == self.repeat_limit + 1:
+            self.exceeded(
+                f"Statement run more than {self.repeat_limit} times in one "
+                f"request, likely an N+1 query: {statement}",
+            )
+
+    def exceeded(self, message: str) -> None:
+        if self.strict:
+            raise TooManyQueriesError(message)
+        logger.warning(message)
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def lift_query_limits() -> None:
+    """
+    Lifts the limits of the current stats, for requests whose number of
+    statements grows with their input by design, such as batched imports.
+    """
+
+    if stats := query_stats.get():
+        stats.limit = stats.repeat_limit = None
+
+
+@contextmanager
+def limit_queries(
+    limit: int | None = None,
+    repeat_limit: int | None = None,
+) -> Iterator[QueryStats]:
+    """
+    Fails the block once it runs more statements than allowed.
+
+        Example:
+            with limit_queries(limit=2) as stats:
+                await service.get_places_tree()
+            assert stats.count == 1
+
+    """
+
+    stats = QueryStats(limit, repeat_limit, strict=True)
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+
+def track_queries(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(  # noqa: PLR0913
+    conn: Connection,
+    _cursor: DBAPICursor,
+    statement: str,
+    _parameters: Any,
+    _context: ExecutionContext | None,
+    _executemany: bool,
+) -> None:
+    if stats := query_stats.get():
+        stats.add(statement)
+        conn.info["query_start_time"] = time.perf_counter()
+
+
+def _after_cursor_execute(  # noqa: PLR0913
+    conn: Connection,
+    _cursor: DBAPICursor,
+    _statement: str,
+    _parameters: Any,
+    _context: ExecutionContext | None,
+    _executemany: bool,
+) -> None:
+    if (stats := query_stats.get()) and (
+        start_time := conn.info.pop("query_start_time", None)
+    ) is not None:
+        stats.duration += time.perf_counter() - start_time
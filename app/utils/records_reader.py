@@ -0,0 +1,94 @@
+"""
+Incremental readers for CSV and NDJSON request bodies.
+
+Both readers consume an async iterable of byte chunks (e.g. `Request.stream()`)
+and yield `(row, record)` pairs as soon as a record is complete, so the body is
+never held in memory as a whole. `row` is the 1-based number of the data row;
+`record` is either a dict of values or the exception describing why the row
+could not be parsed.
+
+"""
+
+import codecs
+import csv
+import json
+from collections.abc import AsyncGenerator, AsyncIterable
+from typing import Any
+
+type Record = tuple[int, dict[str, Any] | Exception]
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes],
+) -> AsyncGenerator[str]:
+    """
+    Decodes UTF-8 chunks and yields lines with their line endings.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def iter_ndjson(
+    chunks: AsyncIterable[bytes],
+) -> AsyncGenerator[Record]:
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, e
+            continue
+        if not isinstance(record, dict):
+            yield row, ValueError("Row must be a JSON object")
+            continue
+        yield row, record
+
+
+async def iter_csv(
+    chunks: AsyncIterable[bytes],
+) -> AsyncGenerator[Record]:
+    """
+    The first record is the header with field names. Empty cells are omitted
+    from the record, so optional fields fall back to their defaults.
+    """
+
+    header: list[str] | None = None
+    pending = ""
+    row = 0
+    async for line in iter_lines(chunks):
+        pending += line
+        # An odd number of quotes means a quoted field spans several lines.
+        if pending.count('"') % 2:
+            continue
+        text, pending = pending, ""
+        values = next(csv.reader([text]), [])
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield (
+                row,
+                ValueError(f"Expected {len(header)} columns, got {len(values)}"),
+            )
+            continue
+        yield (
+            row,
+            {name: value for name, value in zip(header, values, strict=True) if value},
+        )
+    if pending:
+        yield row + 1, ValueError("Unterminated quoted field")
@@ -0,0 +1,160 @@
+"""
+Streaming CSV and NDJSON responses for list endpoints.
+
+Records are encoded and sent in small batches while they are still being read
+from the database cursor, so memory use does not depend on the result size.
+
+"""
+
+import csv
+import io
+from collections.abc import AsyncGenerator, AsyncIterable, Mapping, Sequence
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import Row
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+BATCH_SIZE = 500
+
+# Specificity of the media ranges that match each media type, in order of
+# preference when the client weighs them equally. Wildcards only match regular
+# JSON, so that the streaming types are sent only when asked for.
+MATCHING_RANGES = {
+    JSON_MEDIA_TYPE: {JSON_MEDIA_TYPE: 2, "application/*": 1, "*/*": 0},
+    NDJSON_MEDIA_TYPE: {NDJSON_MEDIA_TYPE: 2},
+    CSV_MEDIA_TYPE: {CSV_MEDIA_TYPE: 2},
+}
+
+
+def negotiate_records_media_type(accept: str | None) -> str | None:
+    """
+    Picks the media type of a list response from the `Accept` header by
+    quality, then by the specificity of the matching range. `q=0` makes a
+    media type unacceptable.
+
+    Returns:
+        str | None: The streaming media type requested by the `Accept` header,
+        or None if the client prefers regular JSON or accepts none of them.
+    """
+
+    if not accept:
+        return None
+    # Media type: (quality, specificity) of the most specific matching range.
+    matches: dict[str, tuple[float, int]] = {}
+    for media_range in accept.split(","):
+        range_type, quality = parse_media_range(media_range)
+        for media_type, ranges in MATCHING_RANGES.items():
+            specificity = ranges.get(range_type)
+            if specificity is not None and (
+                media_type not in matches or specificity > matches[media_type][1]
+            ):
+                matches[media_type] = (quality, specificity)
+    quality, _, _, media_type = max(
+        (
+            (*matches[media_type], -index, media_type)
+            for index, media_type in enumerate(MATCHING_RANGES)
+            if media_type in matches
+        ),
+        default=(0.0, 0, 0, JSON_MEDIA_TYPE),
+    )
+    if quality <= 0 or media_type == JSON_MEDIA_TYPE:
+        return None
+    return media_type
+
+
+def parse_media_range(media_range: str) -> tuple[str, float]:
+    """
+    Returns:
+        tuple[str, float]: The lowercased media range of an `Accept` element
+        and its quality, 0 if the `q` parameter is malformed.
+    """
+
+    range_type, _, params = media_range.partition(";")
+    quality = 1.0
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+    return range_type.strip().lower(), quality
+
+
+async def iter_ndjson_chunks(
+    records: AsyncIterable[BaseModel],
+) -> AsyncGenerator[str]:
+    batch: list[str] = []
+    async for record in records:
+        batch.append(record.model_dump_json())
+        if len(batch) >= BATCH_SIZE:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+async def iter_csv_chunks(
+    records: AsyncIterable[BaseModel],
+    fields: list[str],
+) -> AsyncGenerator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for record in records:
+        writer.writerow(record.model_dump(mode="json"))
+        rows += 1
+        if rows >= BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue()
+
+
+def records_response(
+    media_type: str,
+    records: AsyncIterable[BaseModel],
+    model: type[BaseModel],
+    filename: str,
+) -> StreamingResponse:
+    content: AsyncGenerator[str]
+    headers: dict[str, str] = {}
+    if media_type == CSV_MEDIA_TYPE:
+        content = iter_csv_chunks(records, list(model.model_fields))
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    else:
+        content = iter_ndjson_chunks(records)
+    return StreamingResponse(
+        content=content,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def rows_json_response(
+    rows: Sequence[Row[*tuple[Any, ...]]],
+    headers: Mapping[str, str] | None = None,
+) -> Response:
+    """
+    Serializes query rows to a JSON array of objects in one pass.
+
+    The rows must already have the columns of the endpoint's response model:
+    returning a `Response` skips FastAPI's validation and serialization of
+    `response_model`, which otherwise builds and validates a model per row.
+    """
+
+    # `zip` is an order of magnitude faster than `Row._asdict`.
+    fields = rows[0]._fields if rows else ()
+    return Response(
+        content=to_json([dict(zip(fields, row, strict=True)) for row in rows]),
+        media_type="application/json",
+        headers=headers,
+    )
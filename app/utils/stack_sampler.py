@@ -0,0 +1,166 @@
+"""
+Sampling profiler that writes stacks in the collapsed format of flamegraph.pl,
+speedscope and similar tools: one line per distinct stack, frames from the
+root separated by semicolons, then the number of samples.
+
+    Example:
+        MainThread;run (asyncio/runners.py:118);...;select (selectors.py:468) 42
+
+The sampler runs in its own thread and reads the current frame of the sampled
+threads with `sys._current_frames()`, so the profiled code is not traced and
+only pays for the GIL being taken once per interval.
+
+The current frame of the event loop thread only shows the task that is
+running. Given the loop, the sampler also walks the awaited coroutines of the
+suspended tasks, under a root of their own, so that time spent waiting on
+the database or a lock shows up too. The tasks are walked by a callback on
+the loop thread, between task steps, so that no coroutine changes while it
+is read; when the loop is too busy to run it in time the sample is skipped.
+
+    Example:
+        asyncio tasks;get_places_list (app/api/places.py:70);...;_acquire (asyncpg/pool.py:864) 7
+
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any
+
+SITE_PACKAGES = f"site-packages{os.sep}"
+TASKS_ROOT = "asyncio tasks"
+# Seconds to wait for the loop to walk its tasks.
+TASKS_TIMEOUT = 0.1
+STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def format_frame(frame: FrameType) -> str:
+    filename = frame.f_code.co_filename
+    if SITE_PACKAGES in filename:
+        filename = filename.rpartition(SITE_PACKAGES)[2]
+    elif filename.startswith(STDLIB):
+        filename = filename.removeprefix(STDLIB)
+    else:
+        filename = os.path.relpath(filename)
+    return f"{frame.f_code.co_qualname} ({filename}:{frame.f_lineno})"
+
+
+def collapse_stack(frame: FrameType | None) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(format_frame(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def collapse_coroutine(awaitable: Any) -> list[str]:
+    """
+    Returns:
+        list[str]: The frames of a suspended coroutine, followed by those of
+        the coroutines and generators it awaits, down to the future it is
+        waiting on.
+    """
+
+    stack = []
+    while awaitable is not None:
+        frame = (
+            getattr(awaitable, "cr_frame", None)
+            or getattr(awaitable, "gi_frame", None)
+            or getattr(awaitable, "ag_frame", None)
+        )
+        if frame is None:
+            break
+        stack.append(format_frame(frame))
+        awaitable = (
+            getattr(awaitable, "cr_await", None)
+            or getattr(awaitable, "gi_yieldfrom", None)
+            or getattr(awaitable, "ag_await", None)
+        )
+    return stack
+
+
+def sample_tasks(loop: asyncio.AbstractEventLoop) -> list[list[str]]:
+    """
+    Returns:
+        list[list[str]]: The stacks of the tasks of `loop`. Must run on the
+        loop thread, where every task is suspended between its steps.
+    """
+
+    return [
+        stack
+        for task in asyncio.all_tasks(loop)
+        if (stack := collapse_coroutine(task.get_coro()))
+    ]
+
+
+def request_tasks(
+    loop: asyncio.AbstractEventLoop,
+) -> concurrent.futures.Future[list[list[str]]]:
+    """
+    Schedules `sample_tasks` on the loop thread.
+    """
+
+    future: concurrent.futures.Future[list[list[str]]] = concurrent.futures.Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(sample_tasks(loop))
+        except Exception as e:
+            future.set_exception(e)
+
+    loop.call_soon_threadsafe(run)
+    return future
+
+
+def sample_stacks(
+    duration: float,
+    interval: float,
+    thread_ids: set[int] | None = None,
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> Counter[str]:
+    """
+    Samples the stacks of `thread_ids`, or of all other threads, and of the
+    suspended tasks of `loop`, if given, every `interval` seconds for
+    `duration` seconds. Blocking; meant to be run in a thread of its own.
+
+    Returns:
+        Counter[str]: Number of samples per collapsed stack.
+    """
+
+    own_id = threading.get_ident()
+    samples: Counter[str] = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or (thread_ids and thread_id not in thread_ids):
+                continue
+            stack = [names.get(thread_id, str(thread_id)), *collapse_stack(frame)]
+            samples[";".join(stack)] += 1
+        if loop is not None:
+            # Requested after the threads are sampled, so that the loop
+            # thread is not caught walking its tasks.
+            tasks = request_tasks(loop)
+            try:
+                stacks = tasks.result(timeout=TASKS_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                # The loop is blocked, which the stack of its thread shows.
+                tasks.cancel()
+                stacks = []
+            for stack in stacks:
+                samples[";".join([TASKS_ROOT, *stack])] += 1
+        time.sleep(interval)
+    return samples
+
+
+def format_collapsed(samples: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
@@ -0,0 +1,120 @@
+"""
+Throughput of the places list: ORM models vs plain rows.
+
+Both paths fetch the same rows from the database and render the JSON body:
+
+- orm: `select(Place)`, a `PlaceRLSchema` per instance, then validation and
+  serialization of the list against `response_model`, as FastAPI does.
+- rows: `select(uid, name, parent_uid)` serialized in one step by
+  `rows_json_response`.
+
+The places are created in a transaction that is rolled back afterwards, so
+the benchmark needs a database but leaves no data behind.
+
+    Example:
+        python -m benchmarks.list_serialization --rows 10000
+
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session
+from app.models.place import Place
+from app.models.user import User
+from app.schemas.place import PlaceRLSchema
+from app.utils.records_writer import rows_json_response
+
+places_adapter = TypeAdapter(list[PlaceRLSchema])
+
+
+async def render_orm(session: AsyncSession, owner_uid: int) -> bytes:
+    places = await session.scalars(
+        select(Place).filter(Place.owner_uid == owner_uid),
+    )
+    content = [
+        PlaceRLSchema.model_validate(place, from_attributes=True) for place in places
+    ]
+    value = places_adapter.validate_python(content, from_attributes=True)
+    return json.dumps(
+        places_adapter.dump_python(value, mode="json"),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+async def render_rows(session: AsyncSession, owner_uid: int) -> bytes:
+    rows = await session.execute(
+        select(Place.uid, Place.name, Place.parent_uid).filter(
+            Place.owner_uid == owner_uid,
+        ),
+    )
+    return bytes(rows_json_response(rows.all()).body)
+
+
+async def measure(
+    session: AsyncSession,
+    render: Callable[[AsyncSession, int], Awaitable[bytes]],
+    owner_uid: int,
+    repeat: int,
+) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        # Every request starts with an empty identity map.
+        session.expunge_all()
+        start = time.perf_counter()
+        await render(session, owner_uid)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, rows: int, timings: list[float]) -> None:
+    median = statistics.median(timings)
+    print(
+        f"{name:<6} rows={rows:<7} "
+        f"median={median * 1000:.1f}ms "
+        f"rows/sec={rows / median:,.0f}",
+    )
+
+
+async def run(rows: int, repeat: int) -> None:
+    async with get_session() as session:
+        user = User(email=f"{uuid4().hex}@benchmark.local", password="-")
+        session.add(user)
+        await session.flush()
+        await session.execute(
+            insert(Place),
+            [{"name": f"Place {i}", "owner_uid": user.uid} for i in range(rows)],
+        )
+        try:
+            orm = await measure(session, render_orm, user.uid, repeat)
+            plain = await measure(session, render_rows, user.uid, repeat)
+            assert await render_orm(session, user.uid) == await render_rows(
+                session,
+                user.uid,
+            )
+        finally:
+            await session.rollback()
+    report("orm", rows, orm)
+    report("rows", rows, plain)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Event-loop latency during a login storm.
+
+A probe task stands in for the cheap endpoints served by the same worker: it
+repeatedly sleeps for 1 ms and records how late it wakes up. Meanwhile a burst
+of argon2 verifications runs either inline on the event loop or through
+`AsyncPasswordHasher`.
+
+    Example:
+        python -m benchmarks.password_hashing --logins 200
+
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from argon2 import PasswordHasher
+
+from app.config import settings
+from app.utils.password_hasher import AsyncPasswordHasher
+
+PROBE_INTERVAL = 0.001
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run(logins: int, *, offload: bool) -> list[float]:
+    hasher = PasswordHasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    )
+    password_hash = hasher.hash("password")
+    async_hasher = AsyncPasswordHasher(
+        hasher=hasher,
+        max_workers=settings.PASSWORD_HASHER_WORKERS,
+    )
+
+    async def login() -> None:
+        if offload:
+            await async_hasher.verify(password_hash, "password")
+        else:
+            hasher.verify(password_hash, "password")
+        await asyncio.sleep(0)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL)
+    await asyncio.gather(*(login() for _ in range(logins)))
+    stop.set()
+    await probe_task
+    return lags
+
+
+def report(name: str, lags: list[float]) -> None:
+    percentiles = statistics.quantiles(lags, n=100, method="inclusive")
+    print(
+        f"{name:<10} probes={len(lags):<6} "
+        f"p50={percentiles[49] * 1000:.2f}ms "
+        f"p99={percentiles[98] * 1000:.2f}ms "
+        f"max={max(lags) * 1000:.2f}ms",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+    report("inline", asyncio.run(run(args.logins, offload=False)))
+    report("offloaded", asyncio.run(run(args.logins, offload=True)))
+
+
+if __name__ == "__main__":
+    main()
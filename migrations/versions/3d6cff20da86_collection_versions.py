@@ -0,0 +1,33 @@
+"""collection versions
+
+Revision ID: 3d6cff20da86
+Revises: 6aaba69b1112
+Create Date: 2026-10-18 03:37:56.269034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3d6cff20da86'
+down_revision: Union[str, None] = '6aaba69b1112'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('collection_versions',
+    sa.Column('owner_uid', sa.Integer(), nullable=False, comment='User ID'),
+    sa.Column('collection', sa.String(), nullable=False, comment='Collection name'),
+    sa.Column('version', sa.BigInteger(), nullable=False, comment='Number of transactions that changed the collection'),
+    sa.ForeignKeyConstraint(['owner_uid'], ['users.uid'], name='collection_versions_owner_uid_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_uid', 'collection', name='collection_versions_pkey')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('collection_versions')
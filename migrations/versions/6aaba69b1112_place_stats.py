@@ -0,0 +1,75 @@
+"""place stats
+
+Revision ID: 6aaba69b1112
+Revises: 4d289dc80618
+Create Date: 2026-10-18 03:29:43.388933
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '6aaba69b1112'
+down_revision: Union[str, None] = '4d289dc80618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('place_stats',
+    sa.Column('place_uid', sa.Integer(), nullable=False, comment='Place ID'),
+    sa.Column('items_count', sa.Integer(), nullable=False, comment='Number of items directly in the place'),
+    sa.Column('quantity', sa.Integer(), nullable=False, comment='Total quantity of items directly in the place'),
+    sa.Column('subtree_items_count', sa.Integer(), nullable=False, comment='Number of items in the place and its descendants'),
+    sa.Column('subtree_quantity', sa.Integer(), nullable=False, comment='Total quantity of items in the place and its descendants'),
+    sa.ForeignKeyConstraint(['place_uid'], ['places.uid'], name='place_stats_place_uid_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('place_uid')
+    )
+    op.create_table('place_value_stats',
+    sa.Column('place_uid', sa.Integer(), nullable=False, comment='Place ID'),
+    sa.Column('currency_code', postgresql.ENUM('USD', 'EUR', 'RUB', 'UAH', 'KZT', 'BYN', 'KGS', 'TJS', 'UZS', 'AZN', 'GEL', 'AMD', 'CNY', 'JPY', 'KRW', 'VND', 'THB', name='currency_code', create_type=False), nullable=False, comment='Currency'),
+    sa.Column('value', sa.Double(), nullable=False, comment='Total value of items directly in the place'),
+    sa.Column('subtree_value', sa.Double(), nullable=False, comment='Total value of items in the place and its descendants'),
+    sa.ForeignKeyConstraint(['place_uid'], ['places.uid'], name='place_value_stats_place_uid_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('place_uid', 'currency_code', name='place_value_stats_pkey')
+    )
+    op.execute(
+        """
+        INSERT INTO place_stats (
+            place_uid, items_count, quantity, subtree_items_count, subtree_quantity
+        )
+        SELECT
+            c.ancestor_uid,
+            count(*) FILTER (WHERE c.depth = 0),
+            coalesce(sum(i.quantity) FILTER (WHERE c.depth = 0), 0),
+            count(*),
+            sum(i.quantity)
+        FROM items i
+        INNER JOIN place_closure c ON c.descendant_uid = i.place_uid
+        GROUP BY c.ancestor_uid;
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO place_value_stats (place_uid, currency_code, value, subtree_value)
+        SELECT
+            c.ancestor_uid,
+            i.currency_code,
+            coalesce(sum(i.price * i.quantity) FILTER (WHERE c.depth = 0), 0),
+            sum(i.price * i.quantity)
+        FROM items i
+        INNER JOIN place_closure c ON c.descendant_uid = i.place_uid
+        WHERE i.price IS NOT NULL AND i.currency_code IS NOT NULL
+        GROUP BY c.ancestor_uid, i.currency_code;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('place_value_stats')
+    op.drop_table('place_stats')
@@ -0,0 +1,57 @@
+"""sync_versions
+
+Revision ID: 6b698b42a5dd
+Revises: 3d6cff20da86
+Create Date: 2026-10-18 03:41:51.180342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b698b42a5dd'
+down_revision: Union[str, None] = '3d6cff20da86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tombstones',
+    sa.Column('collection', sa.String(), nullable=False, comment='Collection name'),
+    sa.Column('uid', sa.Integer(), nullable=False, comment='ID of the deleted row'),
+    sa.Column('owner_uid', sa.Integer(), nullable=False, comment='User ID'),
+    sa.Column('version', sa.BigInteger(), nullable=False, comment='Collection version of the deletion'),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False, comment='Deletion date'),
+    sa.ForeignKeyConstraint(['owner_uid'], ['users.uid'], name='tombstones_owner_uid_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('collection', 'uid', name='tombstones_pkey')
+    )
+    op.create_index('tombstones_deleted_at_idx', 'tombstones', ['deleted_at'], unique=False)
+    op.create_index('tombstones_owner_uid_collection_version_uid_idx', 'tombstones', ['owner_uid', 'collection', 'version', 'uid'], unique=False)
+    # Existing rows predate every sync token, version 0 only sends them in full syncs.
+    op.add_column('items', sa.Column('version', sa.BigInteger(), nullable=False, server_default='0', comment='Items collection version of the last change'))
+    op.add_column('items', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now(), comment='Item last changed date'))
+    op.alter_column('items', 'version', server_default=None)
+    op.alter_column('items', 'updated_at', server_default=None)
+    op.create_index('items_owner_uid_version_uid_idx', 'items', ['owner_uid', 'version', 'uid'], unique=False)
+    op.add_column('places', sa.Column('version', sa.BigInteger(), nullable=False, server_default='0', comment='Places collection version of the last change'))
+    op.add_column('places', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now(), comment='Place last changed date'))
+    op.alter_column('places', 'version', server_default=None)
+    op.alter_column('places', 'updated_at', server_default=None)
+    op.create_index('places_owner_uid_version_uid_idx', 'places', ['owner_uid', 'version', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('places_owner_uid_version_uid_idx', table_name='places')
+    op.drop_column('places', 'updated_at')
+    op.drop_column('places', 'version')
+    op.drop_index('items_owner_uid_version_uid_idx', table_name='items')
+    op.drop_column('items', 'updated_at')
+    op.drop_column('items', 'version')
+    op.drop_index('tombstones_owner_uid_collection_version_uid_idx', table_name='tombstones')
+    op.drop_index('tombstones_deleted_at_idx', table_name='tombstones')
+    op.drop_table('tombstones')
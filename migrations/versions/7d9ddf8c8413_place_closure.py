@@ -0,0 +1,55 @@
+"""place closure
+
+Revision ID: 7d9ddf8c8413
+Revises: 26b77e774fe3
+Create Date: 2026-10-18 10:12:41.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d9ddf8c8413'
+down_revision: Union[str, None] = '26b77e774fe3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('place_closure',
+    sa.Column('ancestor_uid', sa.Integer(), nullable=False, comment='Ancestor place ID'),
+    sa.Column('descendant_uid', sa.Integer(), nullable=False, comment='Descendant place ID'),
+    sa.Column('depth', sa.Integer(), nullable=False, comment='Distance between ancestor and descendant'),
+    sa.ForeignKeyConstraint(['ancestor_uid'], ['places.uid'], name='place_closure_ancestor_uid_fkey', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_uid'], ['places.uid'], name='place_closure_descendant_uid_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_uid', 'descendant_uid', name='place_closure_pkey')
+    )
+    op.create_index('place_closure_descendant_uid_depth_idx', 'place_closure', ['descendant_uid', 'depth'], unique=False)
+    op.create_index('places_parent_uid_idx', 'places', ['parent_uid'], unique=False)
+    op.execute(
+        """
+        INSERT INTO place_closure (ancestor_uid, descendant_uid, depth)
+        WITH RECURSIVE tree AS (
+            SELECT uid AS ancestor_uid, uid AS descendant_uid, 0 AS depth
+            FROM places
+
+            UNION ALL
+
+            SELECT t.ancestor_uid, p.uid, t.depth + 1
+            FROM places p
+            INNER JOIN tree t ON p.parent_uid = t.descendant_uid
+        )
+        SELECT ancestor_uid, descendant_uid, depth FROM tree;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('places_parent_uid_idx', table_name='places')
+    op.drop_index('place_closure_descendant_uid_depth_idx', table_name='place_closure')
+    op.drop_table('place_closure')
@@ -13,7 +13,7 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy import select, text
 
 from app.config import settings
-from app.database import engine, get_session
+from app.database import Base, engine, get_session
 from app.main import app
 from app.models.user import User
 
@@ -103,9 +103,7 @@ async def clear_db():
     yield
     async with get_session() as session:
         await session.execute(
-            text(
-                "TRUNCATE users, documents, document_variables, includes, include_variables, variables, images, images_documents, images_includes, folders, recents, favorites, sessions CASCADE",
-            ),
+            text(f"TRUNCATE {', '.join(Base.metadata.tables)} CASCADE"),
         )
         await session.commit()
     await engine.dispose()
@@ -0,0 +1,95 @@
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import PENDING_INVALIDATIONS, UNITS_KEY, cache
+from app.models.unit import Unit
+from app.utils import lru_cache
+from app.utils.cache import Cache, LocalCache, RedisCache
+
+UIDS_ADAPTER = TypeAdapter(frozenset[int])
+
+
+class Loader:
+    """
+    Loads the number of the call, so that a result shows which load it is.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self) -> frozenset[int]:
+        self.calls += 1
+        return frozenset((self.calls,))
+
+
+async def test_get_or_load_loads_on_miss_only():
+    local_cache = Cache(LocalCache(maxsize=10), prefix="test:", ttl=60)
+    load = Loader()
+
+    assert await local_cache.get_or_load("units", UIDS_ADAPTER, load) == {1}
+    assert await local_cache.get_or_load("units", UIDS_ADAPTER, load) == {1}
+    assert load.calls == 1
+
+
+async def test_local_cache_expires_after_ttl(monkeypatch: pytest.MonkeyPatch):
+    now = 1000.0
+    monkeypatch.setattr(lru_cache.time, "time", lambda: now)
+    local_cache = Cache(LocalCache(maxsize=10), prefix="test:", ttl=60)
+    load = Loader()
+
+    assert await local_cache.get_or_load("units", UIDS_ADAPTER, load) == {1}
+    now += 59
+    assert await local_cache.get_or_load("units", UIDS_ADAPTER, load) == {1}
+    now += 1
+    assert await local_cache.get_or_load("units", UIDS_ADAPTER, load) == {2}
+
+
+async def test_keys_are_prefixed():
+    client = FakeAsyncRedis(server=FakeServer())
+    redis_cache = Cache(RedisCache(client), prefix="test:", ttl=60)
+
+    await redis_cache.get_or_load("units", UIDS_ADAPTER, Loader())
+    assert await client.keys() == [b"test:units"]
+    await redis_cache.delete(["units"])
+    assert await client.keys() == []
+
+
+async def test_redis_errors_are_misses():
+    server = FakeServer()
+    server.connected = False
+    redis_cache = Cache(
+        RedisCache(FakeAsyncRedis(server=server)),
+        prefix="test:",
+        ttl=60,
+    )
+    load = Loader()
+
+    assert await redis_cache.get_or_load("units", UIDS_ADAPTER, load) == {1}
+    assert await redis_cache.get_or_load("units", UIDS_ADAPTER, load) == {2}
+    # Invalidations fail quietly too.
+    await redis_cache.delete(["units"])
+
+
+async def test_commit_invalidates_written_tables(db_session: AsyncSession):
+    await cache.set(UNITS_KEY, UIDS_ADAPTER, frozenset((1,)))
+    db_session.add(Unit(code="kg", name="Kilogram", short_name="kg"))
+    await db_session.flush()
+    assert UNITS_KEY in db_session.info[PENDING_INVALIDATIONS]
+    assert await cache.get(UNITS_KEY, UIDS_ADAPTER) == {1}
+
+    await db_session.commit()
+    assert await cache.get(UNITS_KEY, UIDS_ADAPTER) is None
+    assert PENDING_INVALIDATIONS not in db_session.info
+
+
+async def test_rollback_discards_invalidations(db_session: AsyncSession):
+    await cache.set(UNITS_KEY, UIDS_ADAPTER, frozenset((1,)))
+    db_session.add(Unit(code="kg", name="Kilogram", short_name="kg"))
+    await db_session.flush()
+
+    await db_session.rollback()
+    assert PENDING_INVALIDATIONS not in db_session.info
+    assert await cache.get(UNITS_KEY, UIDS_ADAPTER) == {1}
+    await cache.delete([UNITS_KEY])
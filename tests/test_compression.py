@@ -0,0 +1,65 @@
+import gzip
+
+import brotli
+import pytest
+import zstandard
+
+from app.utils.compression import (
+    compress,
+    is_compressible,
+    negotiate_encoding,
+)
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip, br, zstd", "zstd"),
+        ("GZIP;Q=0.5, br;q=0.4", "gzip"),
+        ("zstd;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("br;q=invalid, gzip;q=0.1", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding: str | None, expected: str | None):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_negotiate_encoding_among_available():
+    assert negotiate_encoding("zstd, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("zstd", ["br", "gzip"]) is None
+    # No precompressed copy means no encoding, not every encoding.
+    assert negotiate_encoding("zstd, br, gzip", []) is None
+
+
+@pytest.mark.parametrize(
+    ("media_type", "expected"),
+    [
+        ("text/plain; charset=utf-8", True),
+        ("application/json", True),
+        ("image/svg+xml", True),
+        ("image/png", False),
+        ("application/zip", False),
+        ("application/octet-stream", False),
+        (None, False),
+    ],
+)
+def test_is_compressible(media_type: str | None, expected: bool):
+    assert is_compressible(media_type) is expected
+
+
+def test_compressed_bodies_decode():
+    data = b"flea " * 1000
+
+    # Streamed zstd frames do not record the content size.
+    zstd = zstandard.ZstdDecompressor().decompressobj()
+    assert zstd.decompress(compress("zstd", data)) == data
+    assert brotli.decompress(compress("br", data)) == data
+    assert gzip.decompress(compress("gzip", data)) == data
@@ -0,0 +1,116 @@
+from pathlib import Path
+
+import pytest
+from fastapi import Request, status
+
+from app.config import settings
+from app.utils.file_streamer import FileStreamer, RangeNotSatisfiableError
+
+
+def make_request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+@pytest.fixture()
+async def streamer(tmp_path: Path) -> FileStreamer:
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"0123456789")
+    return await FileStreamer.create(path)
+
+
+@pytest.mark.parametrize(
+    ("http_range", "expected"),
+    [
+        ("bytes=2-4", (2, 4)),
+        ("bytes=7-", (7, 9)),
+        ("bytes=-3", (7, 9)),
+        ("bytes=-20", (0, 9)),
+        ("bytes=9-100", (9, 9)),
+        ("bytes= 1-2", (1, 2)),
+        # Invalid or unsupported ranges are ignored.
+        ("bytes=5-3", None),
+        ("bytes=0-1,3-4", None),
+        ("bytes=+1-2", None),
+        ("bytes=-", None),
+        ("bytes=3", None),
+        ("items=0-1", None),
+    ],
+)
+def test_parse_range(
+    streamer: FileStreamer,
+    http_range: str,
+    expected: tuple[int, int] | None,
+):
+    assert streamer.parse_range(http_range) == expected
+
+
+@pytest.mark.parametrize("http_range", ["bytes=-0", "bytes=10-"])
+def test_unsatisfiable_range(streamer: FileStreamer, http_range: str):
+    with pytest.raises(RangeNotSatisfiableError):
+        streamer.parse_range(http_range)
+
+    response = streamer.get_response(make_request(range=http_range))
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response.headers["Content-Range"] == "bytes */10"
+
+
+async def test_empty_file_is_sent_whole(tmp_path: Path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    streamer = await FileStreamer.create(path)
+
+    assert streamer.parse_range("bytes=0-") is None
+    assert streamer.parse_range("bytes=-5") is None
+
+
+def test_range_response(streamer: FileStreamer):
+    response = streamer.get_response(make_request(range="bytes=2-4"))
+
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.headers["Content-Range"] == "bytes 2-4/10"
+    assert response.headers["Content-Length"] == "3"
+
+
+def test_if_range_matching_validators(streamer: FileStreamer):
+    for validator in (streamer.etag, streamer.last_modified):
+        response = streamer.get_response(
+            make_request(range="bytes=2-4", if_range=validator),
+        )
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+
+
+def test_if_range_stale_validator_sends_whole_file(streamer: FileStreamer):
+    response = streamer.get_response(
+        make_request(range="bytes=2-4", if_range='"stale"'),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Content-Range" not in response.headers
+
+
+async def test_if_range_never_matches_weak_etag(tmp_path: Path):
+    path = tmp_path / "file.txt"
+    path.write_text("x" * settings.COMPRESSION_MINIMUM_SIZE)
+    streamer = await FileStreamer.create(path)
+    assert streamer.etag.startswith("W/")
+
+    response = streamer.get_response(
+        make_request(range="bytes=2-4", if_range=streamer.etag),
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_if_none_match(streamer: FileStreamer):
+    response = streamer.get_response(make_request(if_none_match=streamer.etag))
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == streamer.etag
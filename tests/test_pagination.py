@@ -0,0 +1,57 @@
+import base64
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.dependencies.pagination import KeysetPagination
+from app.models.place import Place
+
+
+def encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def test_cursor_round_trip():
+    cursor = KeysetPagination.encode_cursor(["Shelf", 42])
+
+    assert KeysetPagination.decode_cursor(cursor, 2) == ["Shelf", 42]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        encode(b"\xff\xfe"),
+        encode(b"not json"),
+        encode(b'{"uid": 1}'),
+        encode(b'["Shelf"]'),
+        encode(b'["Shelf", 42, 1]'),
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor: str):
+    with pytest.raises(HTTPException) as exc_info:
+        KeysetPagination.decode_cursor(cursor, 2)
+
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        [1, 42],
+        ["Shelf", "42"],
+        ["Shelf", 42.0],
+        ["Shelf", True],
+        ["Shelf", 2**31],
+        ["Shelf\x00", 42],
+    ],
+)
+def test_cursor_values_must_fit_key_columns(key: list[object]):
+    with pytest.raises(HTTPException) as exc_info:
+        KeysetPagination.check_key(key, [Place.name, Place.uid])
+
+    assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_cursor_values_that_fit_key_columns_pass():
+    KeysetPagination.check_key(["Shelf", 2**31 - 1], [Place.name, Place.uid])
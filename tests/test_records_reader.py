@@ -0,0 +1,64 @@
+import json
+from collections.abc import AsyncGenerator, AsyncIterable
+
+from app.utils.records_reader import Record, iter_csv, iter_ndjson
+
+
+async def iter_chunks(*chunks: bytes) -> AsyncGenerator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def read(records: AsyncIterable[Record]) -> list[Record]:
+    return [record async for record in records]
+
+
+async def test_ndjson_records_span_chunks():
+    records = await read(
+        iter_ndjson(
+            iter_chunks(b'\xef\xbb\xbf{"name": "a"}\n{"na', b'me": "\xc3', b'\xa9"}')
+        ),
+    )
+
+    assert records == [(1, {"name": "a"}), (2, {"name": "é"})]
+
+
+async def test_ndjson_reports_bad_rows_and_skips_blank_lines():
+    records = await read(iter_ndjson(iter_chunks(b'{"name": "a"}\n\n{oops\n[1]\n')))
+
+    assert [row for row, _ in records] == [1, 2, 3]
+    assert records[0][1] == {"name": "a"}
+    assert isinstance(records[1][1], json.JSONDecodeError)
+    assert str(records[2][1]) == "Row must be a JSON object"
+
+
+async def test_csv_records_omit_empty_cells():
+    records = await read(
+        iter_csv(iter_chunks(b"name, quantity,price\r\n", b"a,2,\r\nb,,1.5\r\n")),
+    )
+
+    assert records == [
+        (1, {"name": "a", "quantity": "2"}),
+        (2, {"name": "b", "price": "1.5"}),
+    ]
+
+
+async def test_csv_quoted_field_spans_lines_and_chunks():
+    records = await read(
+        iter_csv(
+            iter_chunks(b'name,description\na,"first\n', b'second, ""quoted"""\n')
+        ),
+    )
+
+    assert records == [
+        (1, {"name": "a", "description": 'first\nsecond, "quoted"'}),
+    ]
+
+
+async def test_csv_reports_bad_rows():
+    records = await read(iter_csv(iter_chunks(b'name,quantity\na\nb,1\nc,"2\n')))
+
+    assert [row for row, _ in records] == [1, 2, 3]
+    assert str(records[0][1]) == "Expected 2 columns, got 1"
+    assert records[1][1] == {"name": "b", "quantity": "1"}
+    assert str(records[2][1]) == "Unterminated quoted field"